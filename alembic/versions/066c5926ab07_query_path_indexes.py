@@ -0,0 +1,59 @@
+"""Query path indexes
+
+Revision ID: 066c5926ab07
+Revises: df1986f9321a
+Create Date: 2026-10-18 10:12:41.503118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '066c5926ab07'
+down_revision: Union[str, None] = 'df1986f9321a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = (
+    ('ix_tender_status_name_id', 'tender', ['status', 'name', 'id']),
+    ('ix_tender_status_service_type_name_id', 'tender', ['status', 'service_type', 'name', 'id']),
+    ('ix_tender_employee_id_name_id', 'tender', ['employee_id', 'name', 'id']),
+    ('ix_bid_tender_id_name_id', 'bid', ['tender_id', 'name', 'id']),
+    ('ix_bid_author_id_name_id', 'bid', ['author_id', 'name', 'id']),
+    ('ix_organization_responsible_user_id_organization_id', 'organization_responsible',
+     ['user_id', 'organization_id']),
+    ('ix_organization_responsible_organization_id_user_id', 'organization_responsible',
+     ['organization_id', 'user_id']),
+)
+
+UNIQUE_CONSTRAINTS = (
+    ('uq_tender_histories_tender_id_version', 'tender_histories', ['tender_id', 'version']),
+    ('uq_bid_histories_bid_id_version', 'bid_histories', ['bid_id', 'version']),
+)
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction block
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES + UNIQUE_CONSTRAINTS:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=(name, table, columns) in UNIQUE_CONSTRAINTS,
+                postgresql_concurrently=True,
+                if_not_exists=True
+            )
+    for name, table, _ in UNIQUE_CONSTRAINTS:
+        op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {name} UNIQUE USING INDEX {name}')
+
+
+def downgrade() -> None:
+    for name, table, _ in UNIQUE_CONSTRAINTS:
+        op.drop_constraint(name, table, type_='unique')
+    with op.get_context().autocommit_block():
+        for name, table, _ in INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,44 @@
+"""Tender full-text search vector
+
+Revision ID: 603c4c163d6e
+Revises: 066c5926ab07
+Create Date: 2026-10-18 14:03:17.214655
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '603c4c163d6e'
+down_revision: Union[str, None] = '066c5926ab07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('simple', name), 'A') || setweight(to_tsvector('simple', description), 'B')"
+)
+
+
+def upgrade() -> None:
+    # adding a stored generated column rewrites the table under an exclusive lock,
+    # only the index is built without blocking writes
+    op.execute(f'ALTER TABLE tender ADD COLUMN IF NOT EXISTS search_vector tsvector '
+               f'GENERATED ALWAYS AS ({SEARCH_VECTOR}) STORED')
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_tender_search_vector',
+            'tender',
+            ['search_vector'],
+            postgresql_using='gin',
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_tender_search_vector', table_name='tender', postgresql_concurrently=True, if_exists=True)
+    op.drop_column('tender', 'search_vector')
@@ -0,0 +1,130 @@
+"""Compact history texts
+
+Revision ID: aab479efe6d7
+Revises: 603c4c163d6e
+Create Date: 2026-10-18 16:41:52.873190
+
+"""
+from typing import Sequence, Union
+from uuid import UUID
+
+from alembic import context, op
+import sqlalchemy as sa
+
+from app.config import AppConfig
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'aab479efe6d7'
+down_revision: Union[str, None] = '603c4c163d6e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+HISTORY_TABLES = ('tender_histories', 'bid_histories')
+BATCH_SIZE = 10_000
+
+# moves the descriptions of one batch of history rows (keyset by id) into history_texts
+COMPACT_BATCH = """
+WITH batch AS (
+    SELECT id, description, sha256(convert_to(description, 'UTF8')) AS digest
+    FROM {table}
+    WHERE id > :after AND description IS NOT NULL
+    ORDER BY id
+    LIMIT :limit
+),
+texts AS (
+    INSERT INTO history_texts (id, text)
+    SELECT DISTINCT digest, description FROM batch
+    ON CONFLICT DO NOTHING
+),
+compacted AS (
+    UPDATE {table} AS history
+    SET description = NULL, description_hash = batch.digest
+    FROM batch
+    WHERE history.id = batch.id
+)
+SELECT id FROM batch ORDER BY id DESC LIMIT 1
+"""
+
+EXPAND_BATCH = """
+WITH batch AS (
+    SELECT history.id, history_texts.text
+    FROM {table} AS history
+    JOIN history_texts ON history_texts.id = history.description_hash
+    WHERE history.id > :after
+    ORDER BY history.id
+    LIMIT :limit
+),
+expanded AS (
+    UPDATE {table} AS history
+    SET description = batch.text, description_hash = NULL
+    FROM batch
+    WHERE history.id = batch.id
+)
+SELECT id FROM batch ORDER BY id DESC LIMIT 1
+"""
+
+
+# --sql output: one set-based statement per table, there are no results to page through
+COMPACT_ALL = """
+WITH texts AS (
+    INSERT INTO history_texts (id, text)
+    SELECT DISTINCT sha256(convert_to(description, 'UTF8')), description FROM {table}
+    WHERE description IS NOT NULL
+    ON CONFLICT DO NOTHING
+)
+UPDATE {table}
+SET description = NULL, description_hash = sha256(convert_to(description, 'UTF8'))
+WHERE description IS NOT NULL
+"""
+
+EXPAND_ALL = """
+UPDATE {table} AS history
+SET description = history_texts.text, description_hash = NULL
+FROM history_texts
+WHERE history_texts.id = history.description_hash
+"""
+
+
+def _run_in_batches(query: str, offline_query: str) -> None:
+    if context.is_offline_mode():
+        for table in HISTORY_TABLES:
+            op.execute(offline_query.format(table=table))
+        return
+    # every batch is committed on its own, so the tables are never locked for the whole run
+    connection = op.get_bind()
+    with op.get_context().autocommit_block():
+        for table in HISTORY_TABLES:
+            after = UUID(int=0)
+            while after is not None:
+                after = connection.execute(
+                    sa.text(query.format(table=table)),
+                    {'after': after, 'limit': BATCH_SIZE}
+                ).scalar()
+
+
+def upgrade() -> None:
+    op.create_table('history_texts',
+    sa.Column('id', sa.LargeBinary(), nullable=False),
+    sa.Column('text', sa.Text(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    for table in HISTORY_TABLES:
+        op.add_column(table, sa.Column('description_hash', sa.LargeBinary(), nullable=True))
+        op.create_foreign_key(
+            f'{table}_description_hash_fkey', table, 'history_texts', ['description_hash'], ['id']
+        )
+        op.alter_column(table, 'description', existing_type=sa.String(), nullable=True)
+    # existing rows are only moved when compact mode is on, uncompacted rows are read either way
+    if AppConfig().compact_history:
+        _run_in_batches(COMPACT_BATCH, COMPACT_ALL)
+
+
+def downgrade() -> None:
+    _run_in_batches(EXPAND_BATCH, EXPAND_ALL)
+    for table in HISTORY_TABLES:
+        op.alter_column(table, 'description', existing_type=sa.String(), nullable=False)
+        op.drop_constraint(f'{table}_description_hash_fkey', table, type_='foreignkey')
+        op.drop_column(table, 'description_hash')
+    op.drop_table('history_texts')
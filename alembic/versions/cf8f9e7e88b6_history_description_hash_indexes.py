@@ -0,0 +1,45 @@
+"""History description hash indexes
+
+Revision ID: cf8f9e7e88b6
+Revises: aab479efe6d7
+Create Date: 2026-10-18 18:20:06.115402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'cf8f9e7e88b6'
+down_revision: Union[str, None] = 'aab479efe6d7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# needed to find history_texts rows no longer referenced by any history row (and by the foreign key checks
+# of deleting them); partial, since rows stored before compact mode don't reference a text
+INDEXES = (
+    ('ix_tender_histories_description_hash', 'tender_histories'),
+    ('ix_bid_histories_description_hash', 'bid_histories'),
+)
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction block
+    with op.get_context().autocommit_block():
+        for name, table in INDEXES:
+            op.create_index(
+                name,
+                table,
+                ['description_hash'],
+                postgresql_where='description_hash IS NOT NULL',
+                postgresql_concurrently=True,
+                if_not_exists=True
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table in INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
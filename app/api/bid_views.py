@@ -1,9 +1,24 @@
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Query, Path
+from fastapi import APIRouter, Depends, Query, Path, Response, Header, Body
+from fastapi.responses import StreamingResponse
 
-from app.schemas.bid_schema import NewBid, BidOut, BidStatus, EditBid, BidOutDecision, BidStatusDecision
+from app.config import AppConfig
+from app.schemas.bid_schema import (
+    NewBid,
+    BidOut,
+    BidStatus,
+    EditBid,
+    BidOutDecision,
+    BidStatusDecision,
+    BidBulkResult,
+    BidVersionOut
+)
 from app.services.bid_service import BidService
+from app.query_counter import query_budget
+from app.serialization import list_response
+from app.server_timing import TimedRoute
+from app.utils import make_etag, make_version_etag, parse_if_match, IMMUTABLE_CACHE_CONTROL
 from app.api.responses import (
     error400,
     error401,
@@ -12,12 +27,14 @@ from app.api.responses import (
     error404_bid_or_version_not_found,
     error404_tender_not_found,
     error404_tender_or_bid_not_found,
+    error409,
+    error412,
     error422,
     error500
 )
 
 
-bid_router = APIRouter(prefix="/bids")
+bid_router = APIRouter(prefix="/bids", route_class=TimedRoute)
 
 
 @bid_router.post(
@@ -41,6 +58,25 @@ async def add_bid(
     return await bid_service.add_bid(bid)
 
 
+@bid_router.post(
+    "/bulk",
+    summary="Массовое создание предложений",
+    description="Создание набора предложений одним запросом. Каждое предложение проверяется так же, "
+                "как в /bids/new, предложения с ошибками пропускаются, остальные создаются.",
+    response_description="Результат для каждого предложения в порядке запроса: "
+                         "созданное предложение или причина отказа.",
+    responses={
+        422: error422,
+        500: error500
+    }
+)
+async def add_bids(
+        bids: list[NewBid] = Body(min_length=1, max_length=AppConfig().bulk_max_items),
+        bid_service: BidService = Depends()
+) -> list[BidBulkResult]:
+    return await bid_service.add_bids(bids)
+
+
 @bid_router.get(
     "/my",
     summary="Получение списка ваших предложений",
@@ -53,8 +89,10 @@ async def add_bid(
     }
 )
 async def get_bids_by_username(
-        limit: int | None = Query(
+        limit: int = Query(
             5,
+            ge=0,
+            le=AppConfig().max_page_size,
             description="Максимальное число возвращаемых объектов.\nИспользуется для запросов с пагинацией."
         ),
         offset: int | None = Query(
@@ -63,9 +101,32 @@ async def get_bids_by_username(
                         "Используется для запросов с пагинацией."
         ),
         username: str | None = Query(None),
+        cursor: str | None = Query(
+            None,
+            description="Курсор следующей страницы из заголовка X-Next-Cursor предыдущего ответа.\n"
+                        "Используется для постраничного обхода без смещения."
+        ),
         bid_service: BidService = Depends()
 ) -> list[BidOut]:
-    return await bid_service.get_bids_for_current_user(limit, offset, username)
+    bids = await bid_service.get_bids_for_current_user(limit, offset, username, cursor)
+    return list_response(BidOut, bids, limit, "name", "id")
+
+
+@bid_router.get(
+    "/export",
+    summary="Выгрузка ваших предложений",
+    description="Выгрузка всех предложений пользователя без пагинации в формате NDJSON: "
+                "по одному предложению в строке. Ответ передается частями по мере чтения из базы.",
+    response_description="Предложения, отсортированные по алфавиту, по одному JSON-объекту в строке.",
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {"application/x-ndjson": {}}},
+        422: error422,
+        500: error500
+    }
+)
+async def export_bids(username: str = Query()) -> StreamingResponse:
+    return StreamingResponse(BidService.export_bids_for_user(username), media_type="application/x-ndjson")
 
 
 @bid_router.get(
@@ -83,8 +144,10 @@ async def get_bids_by_username(
 async def get_bids_by_tender_id(
         tender_id: UUID = Path(alias="tenderId"),
         username: str = Query(),
-        limit: int | None = Query(
+        limit: int = Query(
             5,
+            ge=0,
+            le=AppConfig().max_page_size,
             description="Максимальное число возвращаемых объектов.\nИспользуется для запросов с пагинацией."
         ),
         offset: int | None = Query(
@@ -92,9 +155,15 @@ async def get_bids_by_tender_id(
             description="Какое количество объектов должно быть пропущено с начала.\n"
                         "Используется для запросов с пагинацией."
         ),
+        cursor: str | None = Query(
+            None,
+            description="Курсор следующей страницы из заголовка X-Next-Cursor предыдущего ответа.\n"
+                        "Используется для постраничного обхода без смещения."
+        ),
         bid_service: BidService = Depends()
 ) -> list[BidOut]:
-    return await bid_service.get_bids_by_tender_id(tender_id, username, limit, offset)
+    bids = await bid_service.get_bids_by_tender_id(tender_id, username, limit, offset, cursor)
+    return list_response(BidOut, bids, limit, "name", "id")
 
 
 @bid_router.get(
@@ -118,6 +187,66 @@ async def get_bid_status(
     return await bid_service.get_bid_status_by_bid_id(bid_id, username)
 
 
+@bid_router.get(
+    "/{bidId}/versions",
+    summary="Получение истории версий предложения",
+    description="Список версий предложения в порядке возрастания номера. "
+                "Доступ такой же, как к статусу предложения.",
+    response_description="Версии предложения, отсортированные по номеру версии.",
+    responses={
+        400: error400,
+        401: error401,
+        403: error403,
+        404: error404_bid_not_found,
+        422: error422,
+        500: error500
+    }
+)
+async def get_bid_versions(
+        bid_id: UUID = Path(alias="bidId"),
+        username: str = Query(),
+        limit: int = Query(
+            5,
+            ge=0,
+            le=AppConfig().max_page_size,
+            description="Максимальное число возвращаемых объектов.\nИспользуется для запросов с пагинацией."
+        ),
+        cursor: str | None = Query(
+            None,
+            description="Курсор следующей страницы из заголовка X-Next-Cursor предыдущего ответа."
+        ),
+        bid_service: BidService = Depends()
+) -> list[BidVersionOut]:
+    versions = await bid_service.get_bid_versions(bid_id, username, limit, cursor)
+    return list_response(BidVersionOut, versions, limit, "version")
+
+
+@bid_router.get(
+    "/{bidId}/versions/{version}",
+    summary="Получение версии предложения",
+    description="Параметры предложения в указанной версии. Версии не изменяются, поэтому ответ можно кешировать.",
+    response_description="Версия предложения.",
+    responses={
+        401: error401,
+        403: error403,
+        404: error404_bid_or_version_not_found,
+        422: error422,
+        500: error500
+    }
+)
+async def get_bid_version(
+        response: Response,
+        bid_id: UUID = Path(alias="bidId"),
+        version: int = Path(description="Номер версии"),
+        username: str = Query(),
+        bid_service: BidService = Depends()
+) -> BidVersionOut:
+    bid_version = await bid_service.get_bid_version(bid_id, version, username)
+    response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    response.headers["ETag"] = make_version_etag(bid_version.version)
+    return bid_version
+
+
 @bid_router.put(
     "/{bidId}/status",
     summary="Изменение статуса предложения",
@@ -150,21 +279,33 @@ async def change_bid_status(
         401: error401,
         403: error403,
         404: error404_bid_not_found,
+        409: error409,
+        412: error412,
         422: error422,
         500: error500
     }
 )
 async def edit_bid(
+        response: Response,
         edit_fields: EditBid,
         bid_id: UUID = Path(alias="bidId"),
         username: str = Query(),
+        if_match: str | None = Header(
+            None,
+            alias="If-Match",
+            description="ETag (номер версии) из предыдущего ответа. "
+                        "Изменение применяется, только если текущая версия совпадает с указанной."
+        ),
         bid_service: BidService = Depends()
 ) -> BidOut:
-    return await bid_service.edit_bid(edit_fields, bid_id, username)
+    bid = await bid_service.edit_bid(edit_fields, bid_id, username, parse_if_match(if_match))
+    response.headers["ETag"] = make_etag(bid.version)
+    return bid
 
 
 @bid_router.put(
     "/{bidId}/submit_decision",
+    dependencies=[Depends(query_budget(4))],
     summary="Отправка решения по предложению",
     description="Отправить решение (одобрить или отклонить) по предложению.",
     response_description="Решение по предложению успешно отправлено",
@@ -195,14 +336,25 @@ async def submit_decision(
         401: error401,
         403: error403,
         404: error404_bid_or_version_not_found,
+        409: error409,
+        412: error412,
         422: error422,
         500: error500
     }
 )
 async def rollback_bid_version(
+        response: Response,
         tender_id: UUID = Path(alias="bidId"),
         version: int = Path(),
         username: str = Query(),
+        if_match: str | None = Header(
+            None,
+            alias="If-Match",
+            description="ETag (номер версии) из предыдущего ответа. "
+                        "Изменение применяется, только если текущая версия совпадает с указанной."
+        ),
         bid_service: BidService = Depends()
 ) -> BidOut:
-    return await bid_service.rollback_bid_version(tender_id, version, username)
+    bid = await bid_service.rollback_bid_version(tender_id, version, username, parse_if_match(if_match))
+    response.headers["ETag"] = make_etag(bid.version)
+    return bid
@@ -0,0 +1,66 @@
+from typing import Iterator
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.database import db_connector
+from app.loop_monitor import loop_monitor
+from app.metrics import render_metrics, snapshot
+from app.services.employee_cache import employee_cache
+from app.services.tender_list_cache import tender_list_cache
+
+
+metrics_router = APIRouter()
+
+
+def pool_snapshot(pools: dict[str, dict], name: str, documentation: str, field: str) -> Iterator[str]:
+    return snapshot(name, documentation, {(pool,): status.get(field, 0) for pool, status in pools.items()}, ("pool",))
+
+
+@metrics_router.get(
+    "/metrics",
+    summary="Метрики сервиса",
+    description="Метрики в текстовом формате Prometheus: запросы и задержки по эндпоинтам, "
+                "запросы к БД, состояние пула соединений и задержка event loop.",
+    response_class=PlainTextResponse,
+    include_in_schema=False
+)
+async def get_metrics() -> PlainTextResponse:
+    pools = db_connector.pool_status()
+    cache_stats = employee_cache.stats()
+    page_stats = tender_list_cache.stats()
+    content = render_metrics(
+        pool_snapshot(pools, "db_pool_size", "Configured number of pooled connections", "size"),
+        pool_snapshot(pools, "db_pool_checked_out", "Connections currently checked out of the pool", "checked_out"),
+        pool_snapshot(pools, "db_pool_checked_in", "Idle connections in the pool", "checked_in"),
+        pool_snapshot(pools, "db_pool_overflow", "Connections opened above the pool size", "overflow"),
+        snapshot("employee_cache_size", "Entries in the employee membership cache", cache_stats["size"]),
+        snapshot(
+            "employee_cache_lookups_total",
+            "Employee membership cache lookups by result",
+            {("hit",): cache_stats["hits"], ("miss",): cache_stats["misses"]},
+            ("result",),
+            "counter"
+        ),
+        snapshot(
+            "event_loop_lag_recent_seconds",
+            "Event loop lag quantiles over the last heartbeats",
+            {(str(quantile),): lag for quantile, lag in loop_monitor.quantiles().items()},
+            ("quantile",)
+        ),
+        snapshot(
+            "event_loop_stalls_total",
+            "Heartbeats overdue by more than the threshold",
+            loop_monitor.stalls,
+            metric_type="counter"
+        ),
+        snapshot("tender_list_cache_size", "Published tender pages held in the response cache", page_stats["size"]),
+        snapshot(
+            "tender_list_cache_lookups_total",
+            "Published tender page cache lookups by result",
+            {("hit",): page_stats["hits"], ("miss",): page_stats["misses"]},
+            ("result",),
+            "counter"
+        ),
+    )
+    return PlainTextResponse(content, media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -7,10 +7,16 @@ from app.exceptions.exceptions import (
     TenderNotFound,
     TenderOrVersionNotFound,
     BidNotFound,
-    BidOrVersionNotFound
+    BidOrVersionNotFound,
+    VersionConflict,
+    VersionPreconditionFailed
 )
 
 
+not_modified304 = {
+    "description": "Список не изменился с момента ответа, ETag которого передан в If-None-Match."
+}
+
 error400 = {
     "description": BadParametersPassed.detail,
     "content": {
@@ -110,6 +116,28 @@ error404_bid_or_version_not_found = {
     }
 }
 
+error409 = {
+    "description": VersionConflict.detail,
+    "content": {
+        "application/json": {
+            "example": {
+                "detail": VersionConflict.detail
+            }
+        }
+    }
+}
+
+error412 = {
+    "description": VersionPreconditionFailed.detail,
+    "content": {
+        "application/json": {
+            "example": {
+                "detail": VersionPreconditionFailed.detail
+            }
+        }
+    }
+}
+
 error422 = {
     "description": "Ошибка валидации",
     "content": {
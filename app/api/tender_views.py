@@ -1,37 +1,62 @@
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Query, Path
+from fastapi import APIRouter, Depends, Query, Path, Response, Header, Body
+from fastapi.responses import StreamingResponse
 
-from app.schemas.tender_schema import NewTender, TenderOut, EditTender, TenderStatus, ServiceType
+from app.config import AppConfig
+from app.schemas.tender_schema import (
+    NewTender,
+    TenderOut,
+    EditTender,
+    TenderStatus,
+    ServiceType,
+    TenderBulkResult,
+    TenderSearchResult,
+    TenderVersionOut
+)
 from app.services.tender_service import TenderService
+from app.services.tender_list_cache import etag_matches
+from app.query_counter import query_budget
+from app.serialization import list_response
+from app.server_timing import TimedRoute
+from app.utils import make_etag, make_version_etag, parse_if_match, IMMUTABLE_CACHE_CONTROL
 from app.api.responses import (
+    not_modified304,
     error400,
     error401,
     error403,
     error404_tender_not_found,
     error404_tender_or_version_not_found,
+    error409,
+    error412,
     error422,
     error500
 )
 
 
-tender_router = APIRouter(prefix="/tenders")
+tender_router = APIRouter(prefix="/tenders", route_class=TimedRoute)
 
 
 @tender_router.get(
     "",
+    dependencies=[Depends(query_budget(1))],
     summary="Получение списка тендеров",
     description="Список тендеров с возможностью фильтрации по типу услуг.\n\n"
                 "Если фильтры не заданы, возвращаются все тендеры.",
-    response_description="Список тендеров, отсортированных по алфавиту по названию.",
+    response_description="Список тендеров, отсортированных по алфавиту по названию.\n\n"
+                         "Заголовок ETag позволяет повторить запрос с If-None-Match и получить 304, "
+                         "если список не изменился.",
     responses={
+        304: not_modified304,
         422: error422,
         500: error500
     }
 )
 async def get_tenders(
-        limit: int | None = Query(
+        limit: int = Query(
             5,
+            ge=0,
+            le=AppConfig().max_page_size,
             description="Максимальное число возвращаемых объектов.\nИспользуется для запросов с пагинацией."
         ),
         offset: int | None = Query(
@@ -44,9 +69,25 @@ async def get_tenders(
             description="Возвращенные тендеры должны соответствовать указанным видам услуг.\n\n"
                         "Если список пустой, фильтры не применяются."
         ),
+        cursor: str | None = Query(
+            None,
+            description="Курсор следующей страницы из заголовка X-Next-Cursor предыдущего ответа.\n"
+                        "Используется для постраничного обхода без смещения."
+        ),
+        if_none_match: str | None = Header(
+            None,
+            alias="If-None-Match",
+            description="ETag из предыдущего ответа. Если список не изменился, возвращается 304 без тела."
+        ),
         tender_service: TenderService = Depends()
 ) -> list[TenderOut]:
-    return await tender_service.get_published_tenders(limit, offset, service_type)
+    page = await tender_service.get_published_tenders_page(limit, offset, service_type, cursor)
+    headers = {"ETag": page.etag}
+    if page.next_cursor:
+        headers["X-Next-Cursor"] = page.next_cursor
+    if etag_matches(page.etag, if_none_match):
+        return Response(status_code=304, headers=headers)
+    return Response(page.body, media_type="application/json", headers=headers)
 
 
 @tender_router.post(
@@ -68,6 +109,87 @@ async def add_tender(
     return await tender_service.add_tender(tender)
 
 
+@tender_router.post(
+    "/bulk",
+    summary="Массовое создание тендеров",
+    description="Создание набора тендеров одним запросом. Каждый тендер проверяется так же, как в /tenders/new, "
+                "тендеры с ошибками пропускаются, остальные создаются.",
+    response_description="Результат для каждого тендера в порядке запроса: созданный тендер или причина отказа.",
+    responses={
+        422: error422,
+        500: error500
+    }
+)
+async def add_tenders(
+        tenders: list[NewTender] = Body(min_length=1, max_length=AppConfig().bulk_max_items),
+        tender_service: TenderService = Depends()
+) -> list[TenderBulkResult]:
+    return await tender_service.add_tenders(tenders)
+
+
+@tender_router.get(
+    "/search",
+    summary="Поиск тендеров",
+    description="Полнотекстовый поиск по названию и описанию опубликованных тендеров.\n\n"
+                "Запрос поддерживает синтаксис веб-поиска: слова в кавычках ищутся как фраза, "
+                "\"or\" объединяет варианты, \"-\" исключает слово.",
+    response_description="Список тендеров, отсортированных по убыванию релевантности. "
+                         "Совпадения в названии весят больше, чем в описании.",
+    responses={
+        400: error400,
+        422: error422,
+        500: error500
+    }
+)
+async def search_tenders(
+        q: str = Query(min_length=1, max_length=200, description="Поисковый запрос"),
+        limit: int = Query(
+            5,
+            ge=0,
+            le=AppConfig().max_page_size,
+            description="Максимальное число возвращаемых объектов.\nИспользуется для запросов с пагинацией."
+        ),
+        service_type: list[ServiceType] = Query(
+            None,
+            description="Найденные тендеры должны соответствовать указанным видам услуг.\n\n"
+                        "Если список пустой, фильтры не применяются."
+        ),
+        cursor: str | None = Query(
+            None,
+            description="Курсор следующей страницы из заголовка X-Next-Cursor предыдущего ответа."
+        ),
+        tender_service: TenderService = Depends()
+) -> list[TenderSearchResult]:
+    tenders = await tender_service.search_published_tenders(q, limit, service_type, cursor)
+    return list_response(TenderSearchResult, tenders, limit, "rank", "id")
+
+
+@tender_router.get(
+    "/export",
+    summary="Выгрузка тендеров",
+    description="Выгрузка всех опубликованных тендеров без пагинации в формате NDJSON: "
+                "по одному тендеру в строке. Ответ передается частями по мере чтения из базы.",
+    response_description="Тендеры, отсортированные по алфавиту по названию, по одному JSON-объекту в строке.",
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {"application/x-ndjson": {}}},
+        422: error422,
+        500: error500
+    }
+)
+async def export_tenders(
+        service_type: list[ServiceType] = Query(
+            None,
+            description="Выгруженные тендеры должны соответствовать указанным видам услуг.\n\n"
+                        "Если список пустой, фильтры не применяются."
+        )
+) -> StreamingResponse:
+    return StreamingResponse(
+        TenderService.export_published_tenders(service_type),
+        media_type="application/x-ndjson"
+    )
+
+
 @tender_router.get(
     "/my",
     summary="Получить тендеры пользователя",
@@ -80,8 +202,10 @@ async def add_tender(
     }
 )
 async def get_tenders_by_username(
-        limit: int | None = Query(
+        limit: int = Query(
             5,
+            ge=0,
+            le=AppConfig().max_page_size,
             description="Максимальное число возвращаемых объектов.\nИспользуется для запросов с пагинацией."
         ),
         offset: int | None = Query(
@@ -90,13 +214,20 @@ async def get_tenders_by_username(
                         "Используется для запросов с пагинацией."
         ),
         username: str | None = Query(None),
+        cursor: str | None = Query(
+            None,
+            description="Курсор следующей страницы из заголовка X-Next-Cursor предыдущего ответа.\n"
+                        "Используется для постраничного обхода без смещения."
+        ),
         tender_service: TenderService = Depends()
 ) -> list[TenderOut]:
-    return await tender_service.get_tenders_for_current_user(limit, offset, username)
+    tenders = await tender_service.get_tenders_for_current_user(limit, offset, username, cursor)
+    return list_response(TenderOut, tenders, limit, "name", "id")
 
 
 @tender_router.get(
     "/{tenderId}/status",
+    dependencies=[Depends(query_budget(2))],
     summary="Получение текущего статуса тендера",
     description="Получить статус тендера по его уникальному идентификатору.",
     response_description="Текущий статус тендера.",
@@ -116,6 +247,65 @@ async def get_tender_status(
     return await tender_service.get_tender_status_by_tender_id(tender_id, username)
 
 
+@tender_router.get(
+    "/{tenderId}/versions",
+    summary="Получение истории версий тендера",
+    description="Список версий тендера в порядке возрастания номера. Доступ такой же, как к статусу тендера.",
+    response_description="Версии тендера, отсортированные по номеру версии.",
+    responses={
+        400: error400,
+        401: error401,
+        403: error403,
+        404: error404_tender_not_found,
+        422: error422,
+        500: error500
+    }
+)
+async def get_tender_versions(
+        tender_id: UUID = Path(alias="tenderId"),
+        username: str | None = Query(None),
+        limit: int = Query(
+            5,
+            ge=0,
+            le=AppConfig().max_page_size,
+            description="Максимальное число возвращаемых объектов.\nИспользуется для запросов с пагинацией."
+        ),
+        cursor: str | None = Query(
+            None,
+            description="Курсор следующей страницы из заголовка X-Next-Cursor предыдущего ответа."
+        ),
+        tender_service: TenderService = Depends()
+) -> list[TenderVersionOut]:
+    versions = await tender_service.get_tender_versions(tender_id, username, limit, cursor)
+    return list_response(TenderVersionOut, versions, limit, "version")
+
+
+@tender_router.get(
+    "/{tenderId}/versions/{version}",
+    summary="Получение версии тендера",
+    description="Параметры тендера в указанной версии. Версии не изменяются, поэтому ответ можно кешировать.",
+    response_description="Версия тендера.",
+    responses={
+        401: error401,
+        403: error403,
+        404: error404_tender_or_version_not_found,
+        422: error422,
+        500: error500
+    }
+)
+async def get_tender_version(
+        response: Response,
+        tender_id: UUID = Path(alias="tenderId"),
+        version: int = Path(description="Номер версии"),
+        username: str | None = Query(None),
+        tender_service: TenderService = Depends()
+) -> TenderVersionOut:
+    tender_version = await tender_service.get_tender_version(tender_id, version, username)
+    response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    response.headers["ETag"] = make_version_etag(tender_version.version)
+    return tender_version
+
+
 @tender_router.put(
     "/{tenderId}/status",
     summary="Изменения статуса тендера",
@@ -148,17 +338,28 @@ async def change_tender_status(
         401: error401,
         403: error403,
         404: error404_tender_not_found,
+        409: error409,
+        412: error412,
         422: error422,
         500: error500
     }
 )
 async def edit_tender(
+        response: Response,
         edit_fields: EditTender,
         tender_id: UUID = Path(alias="tenderId",),
         username: str = Query(),
+        if_match: str | None = Header(
+            None,
+            alias="If-Match",
+            description="ETag (номер версии) из предыдущего ответа. "
+                        "Изменение применяется, только если текущая версия совпадает с указанной."
+        ),
         tender_service: TenderService = Depends()
 ) -> TenderOut:
-    return await tender_service.edit_tender(edit_fields, tender_id, username)
+    tender = await tender_service.edit_tender(edit_fields, tender_id, username, parse_if_match(if_match))
+    response.headers["ETag"] = make_etag(tender.version)
+    return tender
 
 
 @tender_router.put(
@@ -171,14 +372,25 @@ async def edit_tender(
         401: error401,
         403: error403,
         404: error404_tender_or_version_not_found,
+        409: error409,
+        412: error412,
         422: error422,
         500: error500
     }
 )
 async def rollback_tender_version(
+        response: Response,
         tender_id: UUID = Path(alias="tenderId"),
         version: int = Path(description="Номер версии, к которой нужно откатить тендер"),
         username: str = Query(),
+        if_match: str | None = Header(
+            None,
+            alias="If-Match",
+            description="ETag (номер версии) из предыдущего ответа. "
+                        "Изменение применяется, только если текущая версия совпадает с указанной."
+        ),
         tender_service: TenderService = Depends()
 ) -> TenderOut:
-    return await tender_service.rollback_tender_version(tender_id, version, username)
+    tender = await tender_service.rollback_tender_version(tender_id, version, username, parse_if_match(if_match))
+    response.headers["ETag"] = make_etag(tender.version)
+    return tender
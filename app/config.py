@@ -1,5 +1,5 @@
 from dotenv import load_dotenv
-from pydantic import PostgresDsn, Field
+from pydantic import PostgresDsn, Field, PositiveInt, AliasChoices
 from pydantic_settings import BaseSettings
 
 
@@ -15,14 +15,147 @@ class PGConfig(BaseSettings):
     scheme: str = "postgresql+asyncpg"
     echo: bool = False
 
-    @property
-    def pg_dsn(self):
-        pg_dsn: str = PostgresDsn.build(
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 30.0
+    pool_recycle: int = 1800
+    pool_pre_ping: bool = False
+    # connections are opened and closed per checkout, pooling is left to an external pooler (PgBouncer)
+    use_null_pool: bool = False
+    # SQLAlchemy's cache of prepared statements per connection and asyncpg's own statement cache,
+    # both must be 0 behind PgBouncer in transaction pooling mode
+    prepared_statement_cache_size: int = 100
+    statement_cache_size: int = 100
+    # connections all worker processes may open to one server together, including a replica pool on the same
+    # server and the EXPLAIN connection of the slow query log; unset keeps the pool settings as is.
+    # The preflight and python -m app.maintenance open a connection each outside of it.
+    connection_budget: int | None = None
+
+    # optional read-only replica used by GET endpoints
+    postgres_replica_host: str | None = None
+    postgres_replica_port: int | None = None
+    # a user's GET requests stay on the primary for this many seconds after their own write
+    replica_stickiness_seconds: float = 5.0
+
+    def _build_dsn(self, host: str | None, port: int) -> str:
+        return PostgresDsn.build(
             scheme=self.scheme,
-            host=self.postgres_host,
-            port=self.postgres_port,
+            host=host,
+            port=port,
             username=self.postgres_username,
             password=self.postgres_password,
             path=self.postgres_database
         ).unicode_string()
+
+    @property
+    def pg_dsn(self):
+        pg_dsn: str = self._build_dsn(self.postgres_host, self.postgres_port)
         return pg_dsn
+
+    @property
+    def replica_dsn(self) -> str | None:
+        if self.postgres_replica_host is None:
+            return None
+        return self._build_dsn(self.postgres_replica_host, self.postgres_replica_port or self.postgres_port)
+
+    @property
+    def replica_shares_server(self) -> bool:
+        return self.replica_dsn is not None and (
+            (self.postgres_replica_host, self.postgres_replica_port or self.postgres_port)
+            == (self.postgres_host, self.postgres_port)
+        )
+
+    def pool_limits(self, workers: int, pools: int = 1, reserved: int = 0) -> tuple[int, int]:
+        """
+        Splits the connection budget between the worker processes.
+        :param pools: pools of one worker connected to the same server
+        :param reserved: connections of one worker opened outside its pools
+        :return: pool_size and max_overflow of one pool
+        """
+        if self.connection_budget is None:
+            return self.pool_size, self.max_overflow
+        per_pool = (self.connection_budget // workers - reserved) // pools
+        if per_pool < 1:
+            raise ValueError(f"A connection budget of {self.connection_budget} is too small for {workers} workers")
+        pool_size = min(self.pool_size, per_pool)
+        return pool_size, min(self.max_overflow, per_pool - pool_size)
+
+
+class ServerConfig(BaseSettings):
+    server_host: str = "0.0.0.0"
+    server_port: int = 8080
+    # uvicorn reads WEB_CONCURRENCY as its default --workers, the pools are sized from the same variable
+    workers: int = Field(1, validation_alias=AliasChoices("web_concurrency", "workers"))
+    # seconds a worker gets to finish its requests on shutdown
+    graceful_timeout: int = 30
+
+
+class SlowQueryConfig(BaseSettings):
+    slow_query_log: bool = False
+    slow_query_threshold_ms: float = 200.0
+    # share of slow SELECT statements re-run with EXPLAIN (ANALYZE, BUFFERS) on a separate connection
+    slow_query_explain_rate: float = 0.1
+    slow_query_explain_timeout_ms: int = 10_000
+    slow_query_log_file: str = "logs/slow_queries.log"
+    slow_query_log_max_bytes: int = 10 * 1024 * 1024
+    slow_query_log_backups: int = 5
+
+
+class ProfilingConfig(BaseSettings):
+    # requests with this header set to the secret are profiled, an empty secret disables the header
+    profiling_secret: str = ""
+    profiling_header: str = "X-Profile"
+    # "METHOD /path" of a route -> profile 1 in N of its requests
+    profiling_routes: dict[str, PositiveInt] = {}
+    # the sampler only gets the GIL every sys.getswitchinterval() (5 ms) while the loop is busy
+    profiling_interval_ms: float = 5.0
+    profiling_dir: str = "logs/profiles"
+
+
+class LoopMonitorConfig(BaseSettings):
+    loop_monitor: bool = True
+    # heartbeat period and the delay after which the blocking stack is logged
+    loop_lag_interval_ms: float = 100.0
+    loop_lag_threshold_ms: float = 250.0
+    # heartbeats the exported lag quantiles are computed over
+    loop_lag_window: int = 600
+
+
+class CacheConfig(BaseSettings):
+    employee_cache_size: int = 10_000
+    employee_cache_ttl: float = 30.0
+    # pages of GET /api/tenders, invalidated on commit, ttl bounds staleness across workers
+    tender_list_cache_size: int = 1_000
+    tender_list_cache_ttl: float = 10.0
+    # historical versions never change, the ttl only bounds how long deleted ones stay visible
+    version_cache_size: int = 10_000
+    version_cache_ttl: float = 3600.0
+
+
+class RetentionConfig(BaseSettings):
+    # a history row is kept while it is one of the last versions of its tender/bid or is recent enough
+    history_keep_versions: int = 10
+    history_keep_days: int = 90
+    # tenders/bids whose history is cleaned in one transaction and the pause between transactions
+    retention_batch_size: int = 500
+    retention_pause_seconds: float = 0.5
+
+
+class AppConfig(BaseSettings):
+    # adds X-Query-Count and X-DB-Time headers to every response
+    debug: bool = False
+    # raise when a route goes over its query_budget or triggers a lazy load, meant for tests
+    strict_queries: bool = False
+    # share of responses carrying a Server-Timing header, 0 leaves the middleware out
+    server_timing_sample_rate: float = 0.0
+    # largest batch accepted by the bulk creation endpoints
+    bulk_max_items: int = 1_000
+    # largest limit accepted by the paginated list endpoints
+    max_page_size: int = 50
+    # rows fetched from the server side cursor at a time by the export endpoints
+    export_batch_size: int = 1_000
+    # store history descriptions once in history_texts instead of copying them into every history row
+    compact_history: bool = False
+    # apply migrations in the lifespan of a single worker server, with several workers or after
+    # `python -m app.pre_start` the lifespan only checks the revision
+    migrate_on_startup: bool = True
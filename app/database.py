@@ -1,27 +1,195 @@
-from typing import AsyncGenerator
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, AsyncIterator
 
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from fastapi import Request
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession, AsyncEngine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
 
-from app.config import PGConfig
+from app.cache import TTLCache
+from app.config import PGConfig, ServerConfig, SlowQueryConfig
+from app.metrics import db_pool_connect, db_pool_wait, instrument_engine
+from app.query_counter import track_queries
+from app.slow_queries import SlowQueryRecorder
+
+
+READ_ONLY_METHODS = ("GET", "HEAD")
+# usernames of the employees acting in a session, sticky to the primary once it commits
+ACTING_USERNAMES = "acting_usernames"
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Times the wait for a pooled connection apart from opening a new one, so connects do not look like contention"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # connection record -> seconds its connect took, read back by the checkout that created it
+        self._connect_seconds = {}
+
+    def _create_connection(self):
+        started_at = time.perf_counter()
+        record = super()._create_connection()
+        self._connect_seconds[record] = time.perf_counter() - started_at
+        return record
+
+    def _do_get(self):
+        started_at = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            db_pool_wait.observe(time.perf_counter() - started_at)
+            raise
+        connect_seconds = self._connect_seconds.pop(record, None)
+        elapsed = time.perf_counter() - started_at
+        if connect_seconds is None:
+            db_pool_wait.observe(elapsed)
+        else:
+            db_pool_wait.observe(elapsed - connect_seconds)
+            db_pool_connect.observe(connect_seconds)
+        return record
 
 
 class PGDatabase:
-    def __init__(self, pg_config: PGConfig = PGConfig()):
+    def __init__(self, pg_config: PGConfig = PGConfig(), workers: int | None = None):
         self.pg_config = pg_config
-        self.engine = create_async_engine(url=self.pg_config.pg_dsn, echo=self.pg_config.echo)
+        self.workers = workers or ServerConfig().workers
+        slow_query_config = SlowQueryConfig()
+        # every worker process has its own pools, each gets its share of the connection budget
+        self.pools_per_server = 2 if self.pg_config.replica_shares_server else 1
+        # one EXPLAIN at a time runs on its own connection
+        self.reserved_connections = 1 if slow_query_config.slow_query_log else 0
+        self.pool_size, self.max_overflow = self.pg_config.pool_limits(
+            self.workers,
+            self.pools_per_server,
+            self.reserved_connections
+        )
+        self.engine = self._create_engine(self.pg_config.pg_dsn)
         self.async_session_factory = async_sessionmaker(
             bind=self.engine,
             autoflush=False,
             autocommit=False,
             expire_on_commit=False
         )
+        replica_dsn = self.pg_config.replica_dsn
+        self.read_engine = self._create_engine(replica_dsn) if replica_dsn else self.engine
+        self.read_session_factory = async_sessionmaker(
+            bind=self.read_engine,
+            autoflush=False,
+            autocommit=False,
+            expire_on_commit=False
+        )
+        if slow_query_config.slow_query_log:
+            recorder = SlowQueryRecorder(slow_query_config)
+            recorder.install(self.engine)
+            if self.has_replica:
+                recorder.install(self.read_engine)
+        # users who wrote recently, their reads go to the primary until the entry expires.
+        # Kept per process: with several workers a read handled by another process may still hit the replica.
+        self.sticky_users = TTLCache(maxsize=100_000, ttl=self.pg_config.replica_stickiness_seconds)
+
+    def _create_engine(self, url: str) -> AsyncEngine:
+        engine = create_async_engine(url=url, echo=self.pg_config.echo, **self._engine_options())
+        track_queries(engine)
+        instrument_engine(engine)
+        return engine
+
+    def _engine_options(self) -> dict:
+        options = {
+            "pool_pre_ping": self.pg_config.pool_pre_ping,
+            "connect_args": {
+                "prepared_statement_cache_size": self.pg_config.prepared_statement_cache_size,
+                "statement_cache_size": self.pg_config.statement_cache_size,
+            },
+        }
+        if self.pg_config.use_null_pool:
+            options["poolclass"] = NullPool
+        else:
+            options.update(
+                poolclass=TimedQueuePool,
+                pool_size=self.pool_size,
+                max_overflow=self.max_overflow,
+                pool_timeout=self.pg_config.pool_timeout,
+                pool_recycle=self.pg_config.pool_recycle
+            )
+        return options
+
+    @property
+    def has_replica(self) -> bool:
+        return self.read_engine is not self.engine
+
+    def connections_per_worker(self) -> int:
+        """Most connections one worker process may hold to the primary server"""
+        return self.pools_per_server * (self.pool_size + self.max_overflow) + self.reserved_connections
+
+    def _engine_pool_status(self, engine: AsyncEngine) -> dict[str, int | str]:
+        pool = engine.pool
+        status = {"pool": type(pool).__name__}
+        if isinstance(pool, AsyncAdaptedQueuePool):
+            status.update(
+                size=pool.size(),
+                checked_out=pool.checkedout(),
+                checked_in=pool.checkedin(),
+                overflow=max(pool.overflow(), 0),
+                max_overflow=self.max_overflow
+            )
+        return status
+
+    def pool_status(self) -> dict[str, dict[str, int | str]]:
+        """:return: engine name (primary, replica) -> state of its pool"""
+        status = {"primary": self._engine_pool_status(self.engine)}
+        if self.has_replica:
+            status["replica"] = self._engine_pool_status(self.read_engine)
+        return status
 
     @property
     def session_factory(self):
         return self.async_session_factory
 
-    async def get_session(self) -> AsyncGenerator[AsyncSession, None]:
+    def _reads_from_replica(self, request: Request) -> bool:
+        if not self.has_replica or request.method not in READ_ONLY_METHODS:
+            return False
+        username = request.query_params.get("username")
+        return username is None or self.sticky_users.get(username) is None
+
+    def is_replica_session(self, session: AsyncSession) -> bool:
+        return self.has_replica and session.bind is self.read_engine
+
+    @asynccontextmanager
+    async def primary_session(self, session: AsyncSession) -> AsyncIterator[AsyncSession]:
+        """The given session when it is bound to the primary, otherwise a session of its own on the primary"""
+        if not self.is_replica_session(session):
+            yield session
+            return
+        async with self.async_session_factory() as primary:
+            yield primary
+
+    def stick_to_primary(self, session: AsyncSession, username: str) -> None:
+        """Called by the services for the employee acting in the request, applied once the session commits"""
+        if self.has_replica:
+            session.info.setdefault(ACTING_USERNAMES, set()).add(username)
+
+    def _mark_sticky_users(self, session: Session) -> None:
+        for username in session.info.pop(ACTING_USERNAMES, ()):
+            self.sticky_users.set(username, True)
+
+    async def get_session(self, request: Request) -> AsyncGenerator[AsyncSession, None]:
+        """
+        Read-only requests are served by the replica when one is configured,
+        everything else (and reads of users who have just written) goes to the primary.
+        """
+        if self._reads_from_replica(request):
+            async with self.read_session_factory() as session:
+                yield session
+            return
         async with self.async_session_factory() as session:
+            if self.has_replica:
+                event.listen(session.sync_session, "after_commit", self._mark_sticky_users)
+            yield session
+
+    async def get_read_session(self) -> AsyncGenerator[AsyncSession, None]:
+        async with self.read_session_factory() as session:
             yield session
 
 
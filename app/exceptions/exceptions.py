@@ -44,3 +44,13 @@ class BidNotFound(BaseExceptions):
 class BidOrVersionNotFound(BaseExceptions):
     status_code: int = 404
     detail: str = "Предложение или версия не найдены"
+
+
+class VersionConflict(BaseExceptions):
+    status_code: int = 409
+    detail: str = "Версия была изменена другим запросом, повторите попытку"
+
+
+class VersionPreconditionFailed(BaseExceptions):
+    status_code: int = 412
+    detail: str = "Текущая версия не совпадает с указанной в заголовке If-Match"
@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from contextlib import suppress
+
+from app.config import LoopMonitorConfig
+from app.metrics import event_loop_lag
+
+
+logger = logging.getLogger(__name__)
+
+QUANTILES = (0.5, 0.9, 0.99, 1.0)
+
+
+class LoopLagMonitor:
+    """
+    A heartbeat task sleeps for ``interval`` and records how much later than that it woke up.
+    A watchdog thread notices when the heartbeat is overdue by more than ``threshold`` and logs
+    the stack of the event loop thread, i.e. of the code blocking it, once per stall.
+    """
+
+    def __init__(self, config: LoopMonitorConfig):
+        self.interval = config.loop_lag_interval_ms / 1000
+        self.threshold = config.loop_lag_threshold_ms / 1000
+        self.recent: deque[float] = deque(maxlen=config.loop_lag_window)
+        self.stalls = 0
+        self._last_beat = time.monotonic()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread_id: int | None = None
+        self._heartbeat_task: asyncio.Task | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopped.clear()
+        self._heartbeat_task = self._loop.create_task(self._heartbeat(), name="loop-lag-heartbeat")
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._heartbeat_task
+
+    async def _heartbeat(self) -> None:
+        while True:
+            started_at = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self._last_beat = time.monotonic()
+            lag = max(self._last_beat - started_at - self.interval, 0.0)
+            self.recent.append(lag)
+            event_loop_lag.observe(lag)
+
+    def _watch(self) -> None:
+        captured_beat = None
+        while not self._stopped.wait(self.interval):
+            beat = self._last_beat
+            overdue = time.monotonic() - beat - self.interval
+            if overdue > self.threshold and beat != captured_beat:
+                captured_beat = beat
+                self.stalls += 1
+                self._capture(overdue)
+
+    def _capture(self, overdue: float) -> None:
+        # runs in the watchdog thread while the loop thread is still blocked
+        frame = sys._current_frames().get(self._loop_thread_id)
+        task = asyncio.current_task(self._loop)
+        stack = "".join(traceback.format_stack(frame)) if frame is not None else "unavailable\n"
+        logger.warning(
+            "Event loop blocked for more than %.0f ms in task %s, stack of the loop thread:\n%s",
+            overdue * 1000,
+            task.get_name() if task is not None else None,
+            stack
+        )
+
+    def quantiles(self) -> dict[float, float]:
+        values = sorted(self.recent)
+        if not values:
+            return {}
+        return {quantile: values[min(int(quantile * len(values)), len(values) - 1)] for quantile in QUANTILES}
+
+
+loop_monitor = LoopLagMonitor(LoopMonitorConfig())
@@ -0,0 +1,167 @@
+import argparse
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+from sqlalchemy import text
+
+from app.config import RetentionConfig
+from app.database import db_connector
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# history table -> (table with the current versions, column referencing it)
+HISTORY_TABLES = {
+    "tender_histories": ("tender", "tender_id"),
+    "bid_histories": ("bid", "bid_id"),
+}
+
+# Walks the entities in primary key order and deletes the history of one batch of them.
+# Versions are numbered without gaps, so the last N versions are the ones above version - N,
+# and the rows are found through the (entity_id, version) unique index.
+DELETE_HISTORY_BATCH = """
+WITH entities AS (
+    SELECT id, version FROM {entity_table}
+    WHERE id > :after
+    ORDER BY id
+    LIMIT :limit
+),
+deleted AS (
+    DELETE FROM {history_table} AS history
+    USING entities
+    WHERE history.{entity_column} = entities.id
+      AND history.version <= entities.version - :keep_versions
+      AND history.created_at < :cutoff
+    RETURNING pg_column_size(history.*) AS size
+)
+SELECT
+    (SELECT id FROM entities ORDER BY id DESC LIMIT 1),
+    count(*),
+    coalesce(sum(size), 0)
+FROM deleted
+"""
+
+# history_texts rows no history row points to any more, e.g. after the deletes above.
+# Writers in compact mode lock the text they reference (ON CONFLICT DO UPDATE), those rows are skipped
+# here instead of being deleted under a history row that is about to point to them.
+DELETE_ORPHAN_TEXTS_BATCH = """
+WITH candidates AS (
+    SELECT id FROM history_texts
+    WHERE id > :after
+    ORDER BY id
+    LIMIT :limit
+    FOR UPDATE SKIP LOCKED
+),
+deleted AS (
+    DELETE FROM history_texts AS texts
+    USING candidates
+    WHERE texts.id = candidates.id
+      AND NOT EXISTS (SELECT 1 FROM tender_histories WHERE description_hash = texts.id)
+      AND NOT EXISTS (SELECT 1 FROM bid_histories WHERE description_hash = texts.id)
+    RETURNING pg_column_size(texts.*) AS size
+)
+SELECT
+    (SELECT id FROM candidates ORDER BY id DESC LIMIT 1),
+    count(*),
+    coalesce(sum(size), 0)
+FROM deleted
+"""
+
+
+@dataclass
+class Reclaimed:
+    rows: int = 0
+    bytes: int = 0
+
+
+async def _run_in_batches(query: str, start, batch_size: int, pause: float, dry_run: bool, **params) -> Reclaimed:
+    """
+    Runs a batch query until it reports no last key, each batch in its own short transaction.
+    The pause between batches leaves room for regular traffic, autovacuum and replicas to catch up.
+    """
+    reclaimed = Reclaimed()
+    after = start
+    while True:
+        async with db_connector.engine.connect() as conn:
+            async with conn.begin() as transaction:
+                result = await conn.execute(text(query), {"after": after, "limit": batch_size, **params})
+                after, rows, size = result.one()
+                if dry_run:
+                    await transaction.rollback()
+        if after is None:
+            return reclaimed
+        reclaimed.rows += rows
+        reclaimed.bytes += size
+        await asyncio.sleep(pause)
+
+
+async def enforce_retention(
+        keep_versions: int,
+        keep_days: int,
+        batch_size: int,
+        pause: float,
+        dry_run: bool = False
+) -> dict[str, Reclaimed]:
+    if keep_versions < 1:
+        raise ValueError("At least the current version has to be kept")
+    # created_at is stored as UTC without a time zone
+    cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=keep_days)
+    report = {}
+    for history_table, (entity_table, entity_column) in HISTORY_TABLES.items():
+        query = DELETE_HISTORY_BATCH.format(
+            entity_table=entity_table,
+            history_table=history_table,
+            entity_column=entity_column
+        )
+        report[history_table] = await _run_in_batches(
+            query,
+            UUID(int=0),
+            batch_size,
+            pause,
+            dry_run,
+            keep_versions=keep_versions,
+            cutoff=cutoff
+        )
+        logger.info("%s: %s rows, %s bytes", history_table, report[history_table].rows, report[history_table].bytes)
+    report["history_texts"] = await _run_in_batches(DELETE_ORPHAN_TEXTS_BATCH, b"", batch_size, pause, dry_run)
+    return report
+
+
+def print_report(report: dict[str, Reclaimed], dry_run: bool) -> None:
+    print(f"{'table':<18} {'rows':>10} {'bytes':>14}" + ("  (dry run, nothing deleted)" if dry_run else ""))
+    for table, reclaimed in report.items():
+        note = ""
+        if dry_run and table == "history_texts":
+            # the history deletes were rolled back, so only texts that were orphaned already are counted
+            note = "  (already orphaned only, texts freed above are not estimated)"
+        print(f"{table:<18} {reclaimed.rows:>10} {reclaimed.bytes:>14}{note}")
+    print(f"{'total':<18} {sum(r.rows for r in report.values()):>10} {sum(r.bytes for r in report.values()):>14}")
+
+
+def main() -> None:
+    config = RetentionConfig()
+    parser = argparse.ArgumentParser(
+        prog="python -m app.maintenance",
+        description="Deletes tender and bid history outside the retention policy. A history row is kept "
+                    "if it is one of the last --keep-versions versions or newer than --keep-days days."
+    )
+    parser.add_argument("--keep-versions", type=int, default=config.history_keep_versions)
+    parser.add_argument("--keep-days", type=int, default=config.history_keep_days)
+    parser.add_argument("--batch-size", type=int, default=config.retention_batch_size,
+                        help="tenders, bids or texts handled per transaction")
+    parser.add_argument("--pause", type=float, default=config.retention_pause_seconds,
+                        help="seconds to wait between transactions")
+    parser.add_argument("--dry-run", action="store_true", help="roll every batch back and only report")
+    args = parser.parse_args()
+    report = asyncio.run(
+        enforce_retention(args.keep_versions, args.keep_days, args.batch_size, args.pause, args.dry_run)
+    )
+    print_report(report, args.dry_run)
+
+
+if __name__ == '__main__':
+    main()
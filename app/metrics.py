@@ -0,0 +1,182 @@
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Iterable, Iterator
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.types import ASGIApp, Scope, Receive, Send, Message
+
+
+# Collectors are only updated from the event loop thread (requests, engine and pool events),
+# so they are plain dicts without locks.
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[tuple, float] = defaultdict(float)
+
+    def inc(self, *labels, amount: float = 1.0) -> None:
+        self._values[labels] += amount
+
+    def collect(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in list(self._values.items()):
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+
+
+class Histogram:
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            labelnames: tuple[str, ...] = (),
+            buckets: tuple[float, ...] = LATENCY_BUCKETS
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # per label values: observations per bucket (last one is +Inf) followed by the sum
+        self._series: dict[tuple, list[float]] = {}
+
+    def observe(self, value: float, *labels) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def collect(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, series in list(self._series.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), series):
+                cumulative += count
+                le = f'le="{bound}"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(series[-1])}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}"
+
+
+def snapshot(
+        name: str,
+        documentation: str,
+        values: dict[tuple, float] | float,
+        labelnames: tuple[str, ...] = (),
+        metric_type: str = "gauge"
+) -> Iterator[str]:
+    """Renders values read at scrape time, e.g. pool state or counters kept by other components"""
+    yield f"# HELP {name} {documentation}"
+    yield f"# TYPE {name} {metric_type}"
+    if not isinstance(values, dict):
+        values = {(): values}
+    for labels, value in values.items():
+        yield f"{name}{_labels(labelnames, labels)} {_number(value)}"
+
+
+http_requests = Counter(
+    "http_requests_total",
+    "HTTP requests by route and status code",
+    ("method", "route", "status")
+)
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route",
+    ("method", "route")
+)
+db_query_duration = Histogram(
+    "db_query_duration_seconds",
+    "SQL statement execution time by statement type",
+    ("statement",)
+)
+db_pool_wait = Histogram(
+    "db_pool_wait_seconds",
+    "Time spent waiting for a connection from the pool, opening a new one excluded"
+)
+db_pool_connect = Histogram(
+    "db_pool_connect_seconds",
+    "Time spent opening a new connection on checkout"
+)
+event_loop_lag = Histogram(
+    "event_loop_lag_seconds",
+    "Delay of the event loop heartbeat behind its schedule"
+)
+
+COLLECTORS = [
+    http_requests, http_request_duration, db_query_duration, db_pool_wait, db_pool_connect, event_loop_lag
+]
+
+
+def render_metrics(*extra: Iterable[str]) -> str:
+    lines = []
+    for collector in COLLECTORS:
+        lines.extend(collector.collect())
+    for collected in extra:
+        lines.extend(collected)
+    return "\n".join(lines) + "\n"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if context is not None:
+        context.metrics_started_at = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    started_at = getattr(context, "metrics_started_at", None)
+    if started_at is not None:
+        db_query_duration.observe(time.perf_counter() - started_at, statement.lstrip().split(None, 1)[0].upper())
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            http_request_duration.observe(time.perf_counter() - started_at, scope["method"], path)
+            http_requests.inc(scope["method"], path, status_code)
@@ -1,4 +1,5 @@
 from app.models.base import Base
+from app.models.history_text import HistoryText
 from app.models.organization import Organization, OrganizationType, OrganizationResponsible
 from app.models.tender import Tender, TenderHistory
 from app.models.employee import Employee
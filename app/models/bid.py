@@ -1,14 +1,20 @@
 from uuid import UUID
 
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import ForeignKey, String, Text
+from sqlalchemy import ForeignKey, String, Text, Index, UniqueConstraint, text
 
 from app.models.base import Base, created_at
+from app.models.history_text import HistoryText
 from app.models.tender import Tender
 from app.schemas.bid_schema import BidStatus
 
 
 class Bid(Base):
+    __table_args__ = (
+        Index("ix_bid_tender_id_name_id", "tender_id", "name", "id"),
+        Index("ix_bid_author_id_name_id", "author_id", "name", "id"),
+    )
+
     name: Mapped[str] = mapped_column(String(100))
     description: Mapped[str] = mapped_column(Text)
     status: Mapped[str] = mapped_column(default=BidStatus.created)
@@ -24,11 +30,30 @@ class Bid(Base):
 
 class BidHistory(Base):
     __tablename__ = 'bid_histories'
+    __table_args__ = (
+        UniqueConstraint("bid_id", "version", name="uq_bid_histories_bid_id_version"),
+        Index(
+            "ix_bid_histories_description_hash",
+            "description_hash",
+            postgresql_where=text("description_hash IS NOT NULL")
+        ),
+    )
+    # column -> column with its digest, see HistoryText
+    text_columns = {"description": "description_hash"}
 
     bid_id: Mapped[UUID] = mapped_column(ForeignKey(Bid.id))
     version: Mapped[int]
     name: Mapped[str]
-    description: Mapped[str]
+    # in compact mode the description is kept in history_texts and only its digest is stored here
+    stored_description: Mapped[str | None] = mapped_column("description")
+    description_hash: Mapped[bytes | None] = mapped_column(ForeignKey(HistoryText.id))
     created_at: Mapped[created_at]
 
     bid = relationship("Bid", back_populates="historical_bids")
+    description_text: Mapped[HistoryText | None] = relationship(lazy="joined")
+
+    @property
+    def description(self) -> str:
+        if self.description_hash is None:
+            return self.stored_description
+        return self.description_text.text
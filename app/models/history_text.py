@@ -0,0 +1,15 @@
+from sqlalchemy import LargeBinary, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class HistoryText(Base):
+    """
+    Text stored once per distinct value and referenced from history rows by its sha256 digest,
+    so edits that don't touch it and rollbacks to older versions don't copy it again.
+    """
+    __tablename__ = 'history_texts'
+
+    id: Mapped[bytes] = mapped_column(LargeBinary, primary_key=True)
+    text: Mapped[str] = mapped_column(Text)
@@ -2,7 +2,7 @@ import enum
 from uuid import UUID
 
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import String, Text, ForeignKey
+from sqlalchemy import String, Text, ForeignKey, Index
 
 from app.models.base import Base, created_at, updated_at
 from app.models.employee import Employee
@@ -29,6 +29,10 @@ class Organization(Base):
 
 
 class OrganizationResponsible(Base):
+    __table_args__ = (
+        Index("ix_organization_responsible_user_id_organization_id", "user_id", "organization_id"),
+        Index("ix_organization_responsible_organization_id_user_id", "organization_id", "user_id"),
+    )
 
     organization_id: Mapped[UUID | None] = mapped_column(ForeignKey(Organization.id, ondelete="CASCADE"))
     user_id: Mapped[UUID | None] = mapped_column(ForeignKey(Employee.id, ondelete="CASCADE"))
@@ -1,15 +1,24 @@
 from uuid import UUID
 
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import ForeignKey
+from sqlalchemy import Computed, ForeignKey, Index, UniqueConstraint, text
 
 from app.models.base import Base, created_at
+from app.models.history_text import HistoryText
 from app.models.organization import Organization
 from app.models.employee import Employee
 from app.schemas.tender_schema import TenderStatus
 
 
 class Tender(Base):
+    __table_args__ = (
+        Index("ix_tender_status_name_id", "status", "name", "id"),
+        Index("ix_tender_status_service_type_name_id", "status", "service_type", "name", "id"),
+        Index("ix_tender_employee_id_name_id", "employee_id", "name", "id"),
+        Index("ix_tender_search_vector", "search_vector", postgresql_using="gin"),
+    )
+
     name: Mapped[str]
     description: Mapped[str]
     service_type: Mapped[str]
@@ -18,20 +27,48 @@ class Tender(Base):
     employee_id: Mapped[UUID] = mapped_column(ForeignKey(Employee.id))
     version: Mapped[int] = mapped_column(default=1)
     created_at: Mapped[created_at]
+    # the 'simple' configuration does no stemming, names and descriptions mix Russian and English words
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('simple', name), 'A') || setweight(to_tsvector('simple', description), 'B')",
+            persisted=True
+        ),
+        deferred=True
+    )
 
     historical_versions = relationship("TenderHistory", back_populates="tender")
 
 
 class TenderHistory(Base):
     __tablename__ = 'tender_histories'
+    __table_args__ = (
+        UniqueConstraint("tender_id", "version", name="uq_tender_histories_tender_id_version"),
+        Index(
+            "ix_tender_histories_description_hash",
+            "description_hash",
+            postgresql_where=text("description_hash IS NOT NULL")
+        ),
+    )
+    # column -> column with its digest, see HistoryText
+    text_columns = {"description": "description_hash"}
 
     tender_id: Mapped[UUID] = mapped_column(ForeignKey(Tender.id))
     version: Mapped[int]
     name: Mapped[str]
-    description: Mapped[str]
+    # in compact mode the description is kept in history_texts and only its digest is stored here
+    stored_description: Mapped[str | None] = mapped_column("description")
+    description_hash: Mapped[bytes | None] = mapped_column(ForeignKey(HistoryText.id))
     service_type: Mapped[str]
     organization_id: Mapped[UUID]
     employee_id: Mapped[UUID]
     created_at: Mapped[created_at]
 
     tender = relationship("Tender", back_populates="historical_versions")
+    description_text: Mapped[HistoryText | None] = relationship(lazy="joined")
+
+    @property
+    def description(self) -> str:
+        if self.description_hash is None:
+            return self.stored_description
+        return self.description_text.text
@@ -1,14 +1,17 @@
 import asyncio
 import logging
+from dataclasses import dataclass
+from pathlib import Path
 
-from sqlalchemy.exc import ProgrammingError
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession, AsyncConnection
 from tenacity import retry, stop_after_attempt, wait_fixed
 
+from app.config import AppConfig
 from app.database import db_connector
-from app.models import Employee, Tender
-from app.models.base import Base
 
 
 logging.basicConfig(level=logging.INFO)
@@ -17,6 +20,33 @@ logger = logging.getLogger(__name__)
 MAX_TRIES = 7
 WAIT_SECONDS = 1.5
 
+ALEMBIC_DIR = Path(__file__).resolve().parent.parent / "alembic"
+# revision matching the tables created by Base.metadata.create_all in releases before migrations were applied
+INITIAL_REVISION = "df1986f9321a"
+# pg_advisory_lock key shared by every process migrating this database
+MIGRATION_LOCK_KEY = 4_207_561_903
+MIGRATION_LOCK_POLL_SECONDS = 0.2
+
+# only the catalog and the single row of alembic_version are read, whatever the size of the tables
+SCHEMA_STATE = """
+SELECT
+    to_regclass('employee') IS NOT NULL AND to_regclass('tender') IS NOT NULL,
+    to_regclass('alembic_version') IS NOT NULL
+"""
+
+# the preflight and python -m app.maintenance, both connect outside the worker pools
+ONE_OFF_CONNECTIONS = 2
+
+CONNECTION_LIMIT = """
+SELECT current_setting('max_connections')::int - current_setting('superuser_reserved_connections')::int
+"""
+
+
+@dataclass
+class SchemaState:
+    has_tables: bool
+    revisions: set[str] | None
+
 
 @retry(
     stop=stop_after_attempt(MAX_TRIES),
@@ -30,24 +60,106 @@ async def init_db(session: AsyncSession):
         raise err
 
 
-async def check_and_create_migration(session: AsyncSession):
-    try:
-        await session.execute(select(Employee))
-        await session.execute(select(Tender))
-    except ProgrammingError:
-        await session.rollback()
-        logger.info("Creating tables")
-        async with db_connector.engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
-    logger.info("Generating needed data")
+def alembic_config() -> Config:
+    # no ini file, so env.py leaves the logging of the running application alone
+    config = Config()
+    config.set_main_option("script_location", str(ALEMBIC_DIR))
+    return config
 
 
-async def main():
+def head_revisions() -> set[str]:
+    return set(ScriptDirectory.from_config(alembic_config()).get_heads())
+
+
+async def get_schema_state(conn: AsyncConnection) -> SchemaState:
+    has_tables, has_version_table = (await conn.execute(text(SCHEMA_STATE))).one()
+    revisions = None
+    if has_version_table:
+        revisions = set((await conn.scalars(text("SELECT version_num FROM alembic_version"))).all())
+    return SchemaState(has_tables=has_tables, revisions=revisions)
+
+
+async def check_schema() -> None:
+    heads = head_revisions()
+    async with db_connector.engine.connect() as conn:
+        state = await get_schema_state(conn)
+    if state.revisions != heads:
+        raise RuntimeError(
+            f"Database schema is at {sorted(state.revisions or [])}, expected {sorted(heads)}. "
+            f"Run 'python -m app.pre_start' first"
+        )
+
+
+async def _acquire_migration_lock(conn: AsyncConnection) -> None:
+    # polled with pg_try_advisory_lock in autocommit mode: a waiter blocked in pg_advisory_lock has an active
+    # statement and so a snapshot, which the concurrent index builds of the lock holder would wait for
+    while not await conn.scalar(text("SELECT pg_try_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY}):
+        await asyncio.sleep(MIGRATION_LOCK_POLL_SECONDS)
+
+
+async def apply_migrations() -> None:
+    """
+    Brings the schema to the head revision. Processes starting at the same time wait for each other
+    on an advisory lock, the ones coming after the first find the schema up to date.
+    """
+    config = alembic_config()
+    heads = head_revisions()
+    async with db_connector.engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await _acquire_migration_lock(conn)
+        try:
+            # checked under the lock, another process may have migrated while this one waited
+            state = await get_schema_state(conn)
+            if state.revisions == heads:
+                logger.info("Database schema is up to date")
+                return
+            if not state.revisions and state.has_tables:
+                logger.info("Tables exist without alembic_version, stamping %s", INITIAL_REVISION)
+                await asyncio.to_thread(command.stamp, config, INITIAL_REVISION)
+            logger.info("Applying migrations")
+            # env.py runs its own event loop, so alembic gets a thread of its own
+            await asyncio.to_thread(command.upgrade, config, "head")
+        finally:
+            await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+
+
+async def check_connection_budget() -> None:
+    """Warns when the pools of all workers together may open more connections than the server accepts"""
+    if db_connector.pg_config.use_null_pool:
+        return
+    workers = db_connector.workers
+    connections = workers * db_connector.connections_per_worker()
+    async with db_connector.engine.connect() as conn:
+        limit = await conn.scalar(text(CONNECTION_LIMIT)) - ONE_OFF_CONNECTIONS
+    if connections > limit:
+        logger.warning(
+            "%s workers may open %s connections, the server accepts %s besides the preflight and maintenance, "
+            "set CONNECTION_BUDGET below it",
+            workers, connections, limit
+        )
+
+
+async def preflight():
+    """One-shot step before the workers start: waits for the database and applies migrations"""
     async with db_connector.session_factory() as session:
         logger.info("Initializing database")
         await init_db(session)
-        await check_and_create_migration(session)
+    await apply_migrations()
+
+
+async def main():
+    """
+    Lifespan hook of every worker. Only a single process server migrates here, the workers of a multi-process
+    one only check the revision, the migrations run once before them in ``python -m app.pre_start``.
+    """
+    if AppConfig().migrate_on_startup and db_connector.workers == 1:
+        await preflight()
+    else:
+        async with db_connector.session_factory() as session:
+            await init_db(session)
+        await check_schema()
+    await check_connection_budget()
 
 
 if __name__ == '__main__':
-    asyncio.run(main())
+    asyncio.run(preflight())
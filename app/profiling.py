@@ -0,0 +1,143 @@
+import asyncio
+import hmac
+import itertools
+import logging
+import os
+import re
+import sys
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from types import FrameType
+
+from starlette.datastructures import MutableHeaders
+from starlette.routing import Match
+from starlette.types import ASGIApp, Scope, Receive, Send, Message
+
+from app.config import ProfilingConfig
+
+
+logger = logging.getLogger(__name__)
+
+
+def _frame_label(frame: FrameType) -> str:
+    return f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_qualname}"
+
+
+def collapse(frame: FrameType) -> str:
+    """Root first, semicolon separated, as expected by flamegraph.pl and speedscope"""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class StackSampler(threading.Thread):
+    """
+    Samples the stack of the event loop thread while a given task is the one running on it,
+    so requests interleaved with the profiled one do not end up in its profile.
+    Statements executed by the async session run in a greenlet, their stacks start at the greenlet.
+    """
+
+    def __init__(self, task: asyncio.Task, interval: float, path: Path):
+        super().__init__(name="stack-sampler", daemon=True)
+        # created on the event loop thread
+        self.loop_thread_id = threading.get_ident()
+        self.loop = task.get_loop()
+        self.task = task
+        self.interval = interval
+        self.path = path
+        self.stacks: Counter[str] = Counter()
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            if asyncio.current_task(self.loop) is not self.task:
+                continue
+            frame = sys._current_frames().get(self.loop_thread_id)
+            if frame is not None:
+                self.stacks[collapse(frame)] += 1
+        self._write()
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def _write(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("w", encoding="utf-8") as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f"{stack} {count}\n")
+        logger.info("Profile with %s samples written to %s", self.stacks.total(), self.path)
+
+
+class ProfilingMiddleware:
+    """
+    Profiles requests carrying the configured secret header and 1 in N requests of the routes
+    configured in ``profiling_routes`` (``{"GET /api/tenders": 100}``). One request is profiled
+    at a time per process. Header triggered responses name the written file in the same header.
+    """
+
+    def __init__(self, app: ASGIApp, config: ProfilingConfig):
+        self.app = app
+        self.secret = config.profiling_secret.encode()
+        self.header = config.profiling_header.lower().encode()
+        self.response_header = config.profiling_header
+        self.interval = config.profiling_interval_ms / 1000
+        self.directory = Path(config.profiling_dir)
+        self.routes = config.profiling_routes
+        self.counters = {route: itertools.count() for route in self.routes}
+        self._active = False
+
+    def _has_secret(self, scope: Scope) -> bool:
+        if not self.secret:
+            return False
+        for name, value in scope["headers"]:
+            if name == self.header:
+                return hmac.compare_digest(value, self.secret)
+        return False
+
+    def _route(self, scope: Scope) -> str | None:
+        for route in scope["app"].router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return f"{scope['method']} {route.path}"
+        return None
+
+    def _is_sampled(self, scope: Scope) -> bool:
+        if not self.routes:
+            return False
+        route = self._route(scope)
+        return route in self.routes and next(self.counters[route]) % self.routes[route] == 0
+
+    def _profile_path(self, scope: Scope) -> Path:
+        timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        path = re.sub(r"[^A-Za-z0-9]+", "_", scope["path"]).strip("_")
+        return self.directory / f"{timestamp}_{os.getpid()}_{scope['method']}_{path}.collapsed"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self._active:
+            await self.app(scope, receive, send)
+            return
+        by_header = self._has_secret(scope)
+        if not by_header and not self._is_sampled(scope):
+            await self.app(scope, receive, send)
+            return
+
+        path = self._profile_path(scope)
+
+        async def send_with_profile(message: Message) -> None:
+            if message["type"] == "http.response.start" and by_header:
+                MutableHeaders(scope=message).append(self.response_header, path.name)
+            await send(message)
+
+        self._active = True
+        sampler = StackSampler(asyncio.current_task(), self.interval, path)
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            # the sampler thread writes the file itself, the event loop does not wait for it
+            sampler.stop()
+            self._active = False
@@ -0,0 +1,132 @@
+import logging
+import time
+from contextvars import ContextVar
+from typing import Callable
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session, ORMExecuteState
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Scope, Receive, Send, Message
+
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class LazyLoadDetected(AssertionError):
+    pass
+
+
+class QueryCounter:
+    __slots__ = ("count", "duration", "budget", "strict", "scope")
+
+    def __init__(self, strict: bool = False, scope: Scope | None = None):
+        self.count = 0
+        self.duration = 0.0
+        self.budget: int | None = None
+        self.strict = strict
+        # the router adds the matched route to this scope in place
+        self.scope = scope
+
+    @property
+    def route(self) -> str | None:
+        if self.scope is None:
+            return None
+        route = self.scope.get("route")
+        return f"{self.scope['method']} {getattr(route, 'path', self.scope['path'])}"
+
+
+current_query_counter: ContextVar[QueryCounter | None] = ContextVar("current_query_counter", default=None)
+
+
+def _count_query(conn, cursor, statement, parameters, context, executemany) -> None:
+    counter = current_query_counter.get()
+    if counter is None:
+        return
+    counter.count += 1
+    if context is not None:
+        context.query_counter_started_at = time.perf_counter()
+    if counter.strict and counter.budget is not None and counter.count > counter.budget:
+        # raised before the statement runs, so the traceback points at the query over the budget
+        raise QueryBudgetExceeded(f"Query {counter.count} exceeds the budget of {counter.budget}: {statement}")
+
+
+def _time_query(conn, cursor, statement, parameters, context, executemany) -> None:
+    counter = current_query_counter.get()
+    started_at = getattr(context, "query_counter_started_at", None)
+    if counter is not None and started_at is not None:
+        counter.duration += time.perf_counter() - started_at
+
+
+def _detect_lazy_load(orm_execute_state: ORMExecuteState) -> None:
+    counter = current_query_counter.get()
+    parent = orm_execute_state.lazy_loaded_from
+    if counter is None or parent is None:
+        return
+    message = f"Lazy load from {parent.class_.__name__}: {orm_execute_state.statement}"
+    if counter.strict:
+        raise LazyLoadDetected(message)
+    logger.warning(message)
+
+
+def track_queries(engine: AsyncEngine) -> None:
+    event.listen(engine.sync_engine, "before_cursor_execute", _count_query)
+    event.listen(engine.sync_engine, "after_cursor_execute", _time_query)
+
+
+event.listen(Session, "do_orm_execute", _detect_lazy_load)
+
+
+def get_query_count() -> int:
+    counter = current_query_counter.get()
+    return counter.count if counter is not None else 0
+
+
+def query_budget(limit: int) -> Callable[[], None]:
+    """
+    Route dependency declaring the most statements the route may issue, checked in strict mode:
+    ``dependencies=[Depends(query_budget(2))]``
+    """
+    def set_budget() -> None:
+        counter = current_query_counter.get()
+        if counter is not None:
+            counter.budget = limit
+
+    return set_budget
+
+
+class QueryCountMiddleware:
+    """
+    Counts SQL statements issued while handling a request and the time spent executing them.
+    With ``header`` enabled they are reported in the X-Query-Count and X-DB-Time (milliseconds) response headers.
+    With ``strict`` enabled a route going over its query budget or triggering a lazy load raises.
+    """
+
+    def __init__(self, app: ASGIApp, header: bool = False, strict: bool = False):
+        self.app = app
+        self.header = header
+        self.strict = strict
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        counter = QueryCounter(strict=self.strict, scope=scope)
+        token = current_query_counter.set(counter)
+
+        async def send_with_count(message: Message) -> None:
+            if message["type"] == "http.response.start" and self.header:
+                headers = MutableHeaders(scope=message)
+                headers.append("X-Query-Count", str(counter.count))
+                headers.append("X-DB-Time", f"{counter.duration * 1000:.3f}")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_count)
+        finally:
+            current_query_counter.reset(token)
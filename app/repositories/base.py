@@ -2,11 +2,18 @@ from typing import Sequence
 from uuid import UUID
 
 from fastapi import Depends
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, AsyncScalarResult
+from sqlalchemy import Insert, Select, Update, func, insert, inspect, literal_column, select, update, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import aliased
 
+from app.config import AppConfig
 from app.database import db_connector
 from app.models.base import Base
+from app.models.history_text import HistoryText
+
+
+app_config = AppConfig()
 
 
 class BaseRepository:
@@ -19,11 +26,30 @@ class BaseRepository:
         stmt = select(self.model).filter_by(**filter_by)
         return await self.session.scalar(stmt)
 
-    async def _get_multi(self, *filters,  order: str = "id", limit: int = 100, offset: int = 0) -> Sequence:
-        stmt = select(self.model).filter(*filters).order_by(order).limit(limit).offset(offset)
+    @staticmethod
+    def _paginate(stmt: Select, order: tuple, after: tuple | None, limit: int, offset: int) -> Select:
+        if after is not None:
+            stmt = stmt.where(tuple_(*order) > tuple(after))
+        return stmt.order_by(*order).limit(limit).offset(offset)
+
+    async def _get_multi(
+            self,
+            *filters,
+            order: tuple[str, ...] = ("id",),
+            after: tuple | None = None,
+            limit: int = 100,
+            offset: int = 0
+    ) -> Sequence:
+        stmt = select(self.model).filter(*filters)
+        stmt = self._paginate(stmt, tuple(getattr(self.model, name) for name in order), after, limit, offset)
         result = await self.session.scalars(stmt)
         return result.all()
 
+    async def _stream(self, stmt: Select, order: tuple) -> AsyncScalarResult:
+        """Iterates the rows through a server side cursor, ``partitions()`` yields them in batches"""
+        stmt = stmt.order_by(*order).execution_options(yield_per=app_config.export_batch_size)
+        return await self.session.stream_scalars(stmt)
+
     async def _add_one(self, **data):
         stmt = insert(self.model).values(**data).returning(self.model)
         result = await self.session.execute(stmt)
@@ -33,3 +59,97 @@ class BaseRepository:
         stmt = update(self.model).values(**data).filter_by(id=_id).returning(self.model)
         result = await self.session.execute(stmt)
         return result.scalar_one()
+
+    def _with_history(
+            self,
+            stmt: Insert | Update,
+            history_model: type[Base],
+            history_fields: dict[str, str]
+    ) -> Select:
+        """
+        Wraps the write so that its rows are appended to the history table by the same statement:
+        WITH written AS (<stmt> RETURNING *), history AS (INSERT ... SELECT FROM written) SELECT * FROM written
+        :param history_fields: history column name -> column name of the written row
+        In compact mode columns listed in ``history_model.text_columns`` are stored in history_texts instead.
+        """
+        # deferred columns (e.g. generated search vectors) are not loaded by the outer select, so they aren't returned
+        columns = [prop.columns[0] for prop in inspect(self.model).column_attrs if not prop.deferred]
+        written = stmt.returning(*columns).cte(f"written_{self.model.__tablename__}")
+        values = {column: written.c[source] for column, source in history_fields.items()}
+        texts = []
+        if app_config.compact_history:
+            for column, hash_column in getattr(history_model, "text_columns", {}).items():
+                text = values.pop(column)
+                digest = func.sha256(func.convert_to(text, literal_column("'UTF8'")))
+                insert_texts = pg_insert(HistoryText).from_select(["id", "text"], select(digest, text).distinct())
+                # a no-op update locks an existing text, so retention can't delete it before this commits
+                texts.append(
+                    insert_texts
+                    .on_conflict_do_update(index_elements=[HistoryText.id], set_={"id": insert_texts.excluded.id})
+                    .cte(f"new_{history_model.__tablename__}_{column}")
+                )
+                values[hash_column] = digest
+        history = insert(history_model).from_select(
+            ["id", *values],
+            select(func.gen_random_uuid(), *values.values())
+        ).cte(f"new_{history_model.__tablename__}")
+        return (
+            select(aliased(self.model, written))
+            .add_cte(*texts, history)
+            .execution_options(populate_existing=True)
+        )
+
+    async def _write_with_history(
+            self,
+            stmt: Insert | Update,
+            history_model: type[Base],
+            history_fields: dict[str, str]
+    ) -> Base | None:
+        return await self.session.scalar(self._with_history(stmt, history_model, history_fields))
+
+    def _with_defaults(self, row: dict) -> dict:
+        # SQLAlchemy fills Python side column defaults in for one DML statement of a query only,
+        # next to the compact mode insert into history_texts they would be sent as NULL
+        defaults = {}
+        for column in self.model.__table__.columns:
+            default = column.default
+            if column.key in row or default is None:
+                continue
+            if default.is_scalar:
+                defaults[column.key] = default.arg
+            elif default.is_callable:
+                defaults[column.key] = default.arg(None)
+        return {**defaults, **row}
+
+    async def _add_one_with_history(self, history_model: type[Base], history_fields: dict[str, str], **data):
+        stmt = insert(self.model).values(**self._with_defaults(data))
+        return await self._write_with_history(stmt, history_model, history_fields)
+
+    async def _add_many_with_history(
+            self,
+            history_model: type[Base],
+            history_fields: dict[str, str],
+            rows: list[dict]
+    ) -> Sequence[Base]:
+        """
+        Inserts all rows and their history with one multi-row INSERT.
+        RETURNING does not keep the order of VALUES, so rows should carry their own ids to be matched by.
+        """
+        if not rows:
+            return []
+        stmt = insert(self.model).values([self._with_defaults(row) for row in rows])
+        result = await self.session.scalars(self._with_history(stmt, history_model, history_fields))
+        return result.all()
+
+    async def _edit_one_with_history(
+            self,
+            _id: UUID,
+            history_model: type[Base],
+            history_fields: dict[str, str],
+            expected_version: int | None = None,
+            **data
+    ):
+        stmt = update(self.model).values(**data, version=self.model.version + 1).filter_by(id=_id)
+        if expected_version is not None:
+            stmt = stmt.filter_by(version=expected_version)
+        return await self._write_with_history(stmt, history_model, history_fields)
@@ -1,7 +1,8 @@
 from typing import Sequence
 from uuid import UUID
 
-from sqlalchemy import select, or_, and_
+from sqlalchemy import Select, select, or_, and_
+from sqlalchemy.ext.asyncio import AsyncScalarResult
 from sqlalchemy.orm import joinedload
 
 from app.models import Employee, OrganizationResponsible
@@ -10,35 +11,60 @@ from app.repositories.base import BaseRepository
 from app.schemas.bid_schema import BidStatus
 
 
+BID_HISTORY_FIELDS = {
+    "bid_id": "id",
+    "version": "version",
+    "name": "name",
+    "description": "description",
+}
+
+
 class BidRepository(BaseRepository):
     model = Bid
 
-    async def add_bid(self, **data) -> model:
-        return await self._add_one(**data)
+    async def add_bid_with_history(self, **data) -> model:
+        return await self._add_one_with_history(BidHistory, BID_HISTORY_FIELDS, **data)
+
+    async def add_bids_with_history(self, rows: list[dict]) -> Sequence[model]:
+        return await self._add_many_with_history(BidHistory, BID_HISTORY_FIELDS, rows)
 
     async def get_bid_by_id(self, bid_id: UUID) -> model | None:
         return await self._get_one(id=bid_id)
 
-    async def edit_bid(self, bid_id: UUID, **data) -> model:
-        return await self._edit_one(bid_id, **data)
+    async def edit_bid_with_history(
+            self,
+            bid_id: UUID,
+            expected_version: int | None = None,
+            **data
+    ) -> model | None:
+        return await self._edit_one_with_history(
+            bid_id,
+            BidHistory,
+            BID_HISTORY_FIELDS,
+            expected_version,
+            **data
+        )
 
     async def get_bids_by_username(
             self,
             username: str,
             limit: int,
             offset: int,
-            order_by: str = "name"
+            after: tuple[str, UUID] | None = None
     ) -> Sequence[model]:
-        stmt = (
+        stmt = self._paginate(self._by_username(username), (self.model.name, self.model.id), after, limit, offset)
+        result = await self.session.scalars(stmt)
+        return result.all()
+
+    async def stream_bids_by_username(self, username: str) -> AsyncScalarResult:
+        return await self._stream(self._by_username(username), (self.model.name, self.model.id))
+
+    def _by_username(self, username: str) -> Select:
+        return (
             select(self.model)
             .join(Employee, self.model.author_id == Employee.id)
             .where(Employee.username == username)
-            .order_by(order_by)
-            .limit(limit)
-            .offset(offset)
         )
-        result = await self.session.scalars(stmt)
-        return result.all()
 
     async def get_bids_by_tender_id_and_username(
             self,
@@ -46,7 +72,7 @@ class BidRepository(BaseRepository):
             organization_id: UUID,
             limit: int,
             offset: int,
-            order_by: str = "name"
+            after: tuple[str, UUID] | None = None
     ) -> Sequence[model]:
         subquery = select(OrganizationResponsible.user_id).where(
             OrganizationResponsible.organization_id == organization_id
@@ -61,10 +87,8 @@ class BidRepository(BaseRepository):
                     Bid.status == BidStatus.published
                 )
             )
-            .order_by(order_by)
-            .limit(limit)
-            .offset(offset)
         )
+        stmt = self._paginate(stmt, (Bid.name, Bid.id), after, limit, offset)
         result = await self.session.scalars(stmt)
         return result.all()
 
@@ -79,9 +103,6 @@ class BidRepository(BaseRepository):
 class BidHistoryRepository(BaseRepository):
     model = BidHistory
 
-    async def add_bid_history(self, **data) -> model:
-        return await self._add_one(**data)
-
     async def get_bid_history(self, bid_id: UUID, version: int) -> model:
         stmt = (
             select(self.model)
@@ -89,3 +110,14 @@ class BidHistoryRepository(BaseRepository):
             .where(and_(self.model.bid_id == bid_id, self.model.version == version))
         )
         return await self.session.scalar(stmt)
+
+    async def get_bid_version(self, bid_id: UUID, version: int) -> model | None:
+        return await self._get_one(bid_id=bid_id, version=version)
+
+    async def get_bid_versions(
+            self,
+            bid_id: UUID,
+            limit: int,
+            after: tuple[int] | None = None
+    ) -> Sequence[model]:
+        return await self._get_multi(self.model.bid_id == bid_id, order=("version",), after=after, limit=limit)
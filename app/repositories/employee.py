@@ -1,3 +1,4 @@
+from typing import Sequence
 from uuid import UUID
 
 from sqlalchemy import select
@@ -18,6 +19,14 @@ class EmployeeRepository(BaseRepository):
                 )
         return await self.session.scalar(stmt)
 
+    async def get_employees(self, column: str, values: set) -> Sequence[model]:
+        stmt = (select(self.model)
+                .options(joinedload(self.model.organizations))
+                .filter(getattr(self.model, column).in_(values))
+                )
+        result = await self.session.scalars(stmt)
+        return result.unique().all()
+
     async def get_employees_organization(
             self,
             user_id1: UUID,
@@ -1,5 +1,7 @@
 from uuid import UUID
 
+from sqlalchemy import select
+
 from app.models.organization import Organization
 from app.repositories.base import BaseRepository
 
@@ -9,3 +11,9 @@ class OrganizationRepository(BaseRepository):
 
     async def get_organization_by_id(self, organization_id: UUID) -> model | None:
         return await self._get_one(id=organization_id)
+
+    async def get_existing_organization_ids(self, organization_ids: set[UUID]) -> set[UUID]:
+        if not organization_ids:
+            return set()
+        result = await self.session.scalars(select(self.model.id).filter(self.model.id.in_(organization_ids)))
+        return set(result)
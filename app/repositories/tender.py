@@ -1,7 +1,8 @@
 from typing import Sequence
 from uuid import UUID
 
-from sqlalchemy import select, and_
+from sqlalchemy import Row, select, and_, or_, func
+from sqlalchemy.ext.asyncio import AsyncScalarResult
 from sqlalchemy.orm import joinedload
 
 from app.models.tender import Tender, TenderHistory
@@ -10,50 +11,107 @@ from app.repositories.base import BaseRepository
 from app.schemas.tender_schema import TenderStatus
 
 
+TENDER_HISTORY_FIELDS = {
+    "tender_id": "id",
+    "version": "version",
+    "name": "name",
+    "description": "description",
+    "service_type": "service_type",
+    "organization_id": "organization_id",
+    "employee_id": "employee_id",
+}
+
+
 class TenderRepository(BaseRepository):
     model = Tender
 
-    async def add_tender(self, **data) -> model:
-        return await self._add_one(**data)
+    async def add_tender_with_history(self, **data) -> model:
+        return await self._add_one_with_history(TenderHistory, TENDER_HISTORY_FIELDS, **data)
+
+    async def add_tenders_with_history(self, rows: list[dict]) -> Sequence[model]:
+        return await self._add_many_with_history(TenderHistory, TENDER_HISTORY_FIELDS, rows)
 
     async def get_tender_by_id(self, tender_id: UUID) -> model | None:
         return await self._get_one(id=tender_id)
 
-    async def edit_tender(self, tender_id: UUID, **data) -> model:
-        return await self._edit_one(tender_id, **data)
+    async def get_tenders_by_ids(self, tender_ids: set[UUID]) -> Sequence[model]:
+        return await self._get_multi(self.model.id.in_(tender_ids), limit=len(tender_ids))
+
+    async def edit_tender_with_history(
+            self,
+            tender_id: UUID,
+            expected_version: int | None = None,
+            **data
+    ) -> model | None:
+        return await self._edit_one_with_history(
+            tender_id,
+            TenderHistory,
+            TENDER_HISTORY_FIELDS,
+            expected_version,
+            **data
+        )
 
     async def get_published_tenders(
             self,
             limit: int,
             offset: int,
             service_type: list[str] | None = None,
-            order_by: str = "name"
+            after: tuple[str, UUID] | None = None
     ) -> Sequence[model]:
-        filters = [self.model.status == TenderStatus.published]
-        if service_type is not None:
-            filters.append(self.model.service_type.in_(service_type))
         return await self._get_multi(
-            *filters,
-            order=order_by,
+            *self._published_filters(service_type),
+            order=("name", "id"),
+            after=after,
             limit=limit,
             offset=offset
         )
 
+    async def stream_published_tenders(self, service_type: list[str] | None = None) -> AsyncScalarResult:
+        stmt = select(self.model).filter(*self._published_filters(service_type))
+        return await self._stream(stmt, (self.model.name, self.model.id))
+
+    async def search_published_tenders(
+            self,
+            query: str,
+            limit: int,
+            service_type: list[str] | None = None,
+            after: tuple[float, UUID] | None = None
+    ) -> Sequence[Row[tuple[model, float]]]:
+        """
+        Published tenders matching a web search style query, best matches first.
+        :param after: (rank, id) of the last tender of the previous page
+        """
+        ts_query = func.websearch_to_tsquery("simple", query)
+        rank = func.ts_rank(self.model.search_vector, ts_query)
+        stmt = (
+            select(self.model, rank.label("rank"))
+            .filter(*self._published_filters(service_type), self.model.search_vector.op("@@")(ts_query))
+        )
+        if after is not None:
+            stmt = stmt.where(or_(rank < after[0], and_(rank == after[0], self.model.id > after[1])))
+        stmt = stmt.order_by(rank.desc(), self.model.id).limit(limit)
+        result = await self.session.execute(stmt)
+        return result.all()
+
+    def _published_filters(self, service_type: list[str] | None = None) -> list:
+        filters = [self.model.status == TenderStatus.published]
+        if service_type is not None:
+            filters.append(self.model.service_type.in_(service_type))
+        return filters
+
     async def get_tender_by_username(
             self,
             username: str,
             limit: int,
             offset: int,
-            order_by: str = "name"
+            after: tuple[str, UUID] | None = None
     ) -> Sequence[model]:
         stmt = (
             select(self.model)
             .join(Employee, self.model.employee_id == Employee.id)
             .where(Employee.username == username)
-            .order_by(order_by)
-            .limit(limit)
-            .offset(offset)
         )
+        stmt = self._paginate(stmt, (self.model.name, self.model.id), after, limit, offset)
         result = await self.session.scalars(stmt)
         return result.all()
 
@@ -61,9 +119,6 @@ class TenderRepository(BaseRepository):
 class TenderHistoryRepository(BaseRepository):
     model = TenderHistory
 
-    async def add_tender_history(self, **data) -> model:
-        return await self._add_one(**data)
-
     async def get_tender_history(self, tender_id: UUID, version: int) -> model:
         stmt = (
             select(self.model)
@@ -71,3 +126,14 @@ class TenderHistoryRepository(BaseRepository):
             .where(and_(self.model.tender_id == tender_id, self.model.version == version))
         )
         return await self.session.scalar(stmt)
+
+    async def get_tender_version(self, tender_id: UUID, version: int) -> model | None:
+        return await self._get_one(tender_id=tender_id, version=version)
+
+    async def get_tender_versions(
+            self,
+            tender_id: UUID,
+            limit: int,
+            after: tuple[int] | None = None
+    ) -> Sequence[model]:
+        return await self._get_multi(self.model.tender_id == tender_id, order=("version",), after=after, limit=limit)
@@ -46,6 +46,13 @@ class BidOut(BaseSchema):
     )
 
 
+class BidVersionOut(BaseSchema):
+    version: int = Field(description="Номер версии")
+    name: str = Field(description="Полное название предложения в этой версии")
+    description: str = Field(description="Описание предложения в этой версии")
+    created_at: datetime = Field(description="Серверная дата и время создания версии")
+
+
 class NewBid(BaseSchema):
     name: str = Field(max_length=100, description="Полное название предложения")
     description: str = Field(max_length=500, description="Описание предложения")
@@ -60,6 +67,13 @@ class NewBid(BaseSchema):
     )
 
 
+class BidBulkResult(BaseSchema):
+    index: int = Field(description="Позиция предложения в теле запроса")
+    status_code: int = Field(description="Код ответа, который вернул бы /bids/new для этого предложения")
+    bid: BidOut | None = Field(None, description="Созданное предложение")
+    detail: str | None = Field(None, description="Причина, по которой предложение не создано")
+
+
 class EditBid(BaseSchema):
     name: str | None = Field(max_length=100, description="Полное название предложения")
     description: str | None = Field(max_length=500, description="Описание предложения")
@@ -41,6 +41,18 @@ class TenderOut(BaseSchema):
     )
 
 
+class TenderSearchResult(TenderOut):
+    rank: float = Field(description="Релевантность тендера поисковому запросу, чем больше, тем выше в выдаче")
+
+
+class TenderVersionOut(BaseSchema):
+    version: int = Field(description="Номер версии")
+    name: str = Field(description="Полное название тендера в этой версии")
+    description: str = Field(description="Описание тендера в этой версии")
+    service_type: ServiceType = Field(description="Вид услуги в этой версии")
+    created_at: datetime = Field(description="Серверная дата и время создания версии")
+
+
 class NewTender(BaseSchema):
     name: str = Field(max_length=100, description="Полное название тендера")
     description: str = Field(max_length=500, description="Описание тендера")
@@ -55,6 +67,13 @@ class NewTender(BaseSchema):
     )
 
 
+class TenderBulkResult(BaseSchema):
+    index: int = Field(description="Позиция тендера в теле запроса")
+    status_code: int = Field(description="Код ответа, который вернул бы /tenders/new для этого тендера")
+    tender: TenderOut | None = Field(None, description="Созданный тендер")
+    detail: str | None = Field(None, description="Причина, по которой тендер не создан")
+
+
 class EditTender(BaseSchema):
     name: str | None = Field(None, max_length=100, description="Полное название тендера")
     description: str | None = Field(None, max_length=500, description="Описание тендера")
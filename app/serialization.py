@@ -0,0 +1,33 @@
+from functools import cache
+from typing import Iterable
+
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+
+from app.server_timing import timed
+from app.utils import next_cursor
+
+
+@cache
+def list_adapter(schema: type[BaseModel]) -> TypeAdapter:
+    """Building a TypeAdapter compiles its validator and serializer, so there is one per schema"""
+    return TypeAdapter(list[schema])
+
+
+@timed("serialize")
+def validate_list(schema: type[BaseModel], rows: Iterable) -> list:
+    """Validates a whole page of ORM rows in one pydantic-core call"""
+    return list_adapter(schema).validate_python(rows, from_attributes=True)
+
+
+@timed("serialize")
+def list_response(schema: type[BaseModel], items: list, limit: int | None = None, *cursor_fields: str) -> Response:
+    """
+    Serializes already validated items straight to JSON bytes. A returned Response skips FastAPI's
+    second validation against the response model, which is still used for the OpenAPI schema.
+    :param cursor_fields: fields of the last item encoded into the X-Next-Cursor header
+    """
+    headers = {}
+    if cursor_fields and (cursor_value := next_cursor(items, limit, *cursor_fields)):
+        headers["X-Next-Cursor"] = cursor_value
+    return Response(list_adapter(schema).dump_json(items), media_type="application/json", headers=headers)
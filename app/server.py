@@ -0,0 +1,42 @@
+import asyncio
+import logging
+import os
+
+import uvicorn
+
+from app.config import AppConfig, ServerConfig
+from app.database import db_connector
+from app.pre_start import preflight
+
+
+logger = logging.getLogger(__name__)
+
+
+async def _preflight() -> None:
+    try:
+        await preflight()
+    finally:
+        # the connections belong to this event loop, a single in-process worker would reuse them otherwise
+        await db_connector.engine.dispose()
+
+
+def main() -> None:
+    config = ServerConfig()
+    if AppConfig().migrate_on_startup:
+        # migrations run once here, the workers inherit the environment and only check the revision
+        asyncio.run(_preflight())
+        os.environ["MIGRATE_ON_STARTUP"] = "false"
+    # the workers size their pools from the same variable whichever one the count came from
+    os.environ["WEB_CONCURRENCY"] = str(config.workers)
+    logger.info("Starting %s worker(s) on %s:%s", config.workers, config.server_host, config.server_port)
+    uvicorn.run(
+        "main:app",
+        host=config.server_host,
+        port=config.server_port,
+        workers=config.workers,
+        timeout_graceful_shutdown=config.graceful_timeout
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+import inspect
+import random
+import time
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Scope, Receive, Send, Message
+
+from app.query_counter import current_query_counter
+
+
+# Phases reported in the Server-Timing header. They may overlap: auth includes its own queries,
+# commit includes the flush statements, all of which are also part of db.
+PHASES = {
+    "deps": "Request parsing and dependency construction",
+    "auth": "Employee and permission lookups",
+    "db": "SQL statement execution",
+    "commit": "Session commit",
+    "serialize": "Pydantic validation and JSON serialization",
+    "total": "Until the response started",
+}
+
+
+class ServerTimings:
+    __slots__ = ("started_at", "endpoint_finished_at", "durations")
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.endpoint_finished_at: float | None = None
+        self.durations: dict[str, float] = {}
+
+    def add(self, phase: str, seconds: float) -> None:
+        self.durations[phase] = self.durations.get(phase, 0.0) + seconds
+
+    def header(self) -> str:
+        return ", ".join(
+            f'{phase};dur={seconds * 1000:.3f};desc="{PHASES[phase]}"'
+            for phase, seconds in self.durations.items()
+        )
+
+
+# None unless the request was sampled, every instrumentation point only does this lookup then
+current_timings: ContextVar[ServerTimings | None] = ContextVar("current_timings", default=None)
+
+
+def timed(phase: str) -> Callable:
+    """Adds the run time of the decorated function or coroutine function to a phase of the sampled request"""
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                timings = current_timings.get()
+                if timings is None:
+                    return await func(*args, **kwargs)
+                started_at = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    timings.add(phase, time.perf_counter() - started_at)
+
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            timings = current_timings.get()
+            if timings is None:
+                return func(*args, **kwargs)
+            started_at = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                timings.add(phase, time.perf_counter() - started_at)
+
+        return wrapper
+
+    return decorator
+
+
+def _timed_endpoint(endpoint: Callable) -> Callable:
+    # everything between the request start and the endpoint call is parsing and dependency solving,
+    # everything between its return and the response start is FastAPI's response serialization
+    @wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        timings = current_timings.get()
+        if timings is None:
+            return await endpoint(*args, **kwargs)
+        timings.add("deps", time.perf_counter() - timings.started_at)
+        try:
+            return await endpoint(*args, **kwargs)
+        finally:
+            timings.endpoint_finished_at = time.perf_counter()
+
+    wrapper.server_timed = True
+    return wrapper
+
+
+class TimedRoute(APIRoute):
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        # include_router builds the route again from the already wrapped endpoint
+        if not getattr(endpoint, "server_timed", False):
+            endpoint = _timed_endpoint(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+
+def _before_commit(session: Session) -> None:
+    if current_timings.get() is not None:
+        session.info["server_timing_commit_started_at"] = time.perf_counter()
+
+
+def _after_commit(session: Session) -> None:
+    started_at = session.info.pop("server_timing_commit_started_at", None)
+    timings = current_timings.get()
+    if started_at is not None and timings is not None:
+        timings.add("commit", time.perf_counter() - started_at)
+
+
+event.listen(Session, "before_commit", _before_commit)
+event.listen(Session, "after_commit", _after_commit)
+
+
+class ServerTimingMiddleware:
+    """
+    Adds a Server-Timing header to ``sample_rate`` of the responses.
+    Has to run inside QueryCountMiddleware, the db phase is the time counted there.
+    """
+
+    def __init__(self, app: ASGIApp, sample_rate: float):
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or random.random() >= self.sample_rate:
+            await self.app(scope, receive, send)
+            return
+
+        timings = ServerTimings()
+        token = current_timings.set(timings)
+
+        async def send_with_timings(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                now = time.perf_counter()
+                if timings.endpoint_finished_at is not None:
+                    timings.add("serialize", now - timings.endpoint_finished_at)
+                counter = current_query_counter.get()
+                if counter is not None:
+                    timings.add("db", counter.duration)
+                timings.add("total", now - timings.started_at)
+                MutableHeaders(scope=message).append("Server-Timing", timings.header())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timings)
+        finally:
+            current_timings.reset(token)
@@ -1,21 +1,42 @@
-from uuid import UUID
+from typing import AsyncIterator
+from uuid import UUID, uuid4
 
 from fastapi import Depends
 
+from app.database import db_connector
 from app.models import Bid
 from app.repositories.bid import BidRepository, BidHistoryRepository
 from app.repositories.organization import OrganizationRepository
-from app.schemas.bid_schema import NewBid, BidOut, AuthorType, BidStatus, EditBid, BidOutDecision, BidStatusDecision
+from app.schemas.bid_schema import (
+    NewBid,
+    BidOut,
+    AuthorType,
+    BidStatus,
+    EditBid,
+    BidOutDecision,
+    BidStatusDecision,
+    BidBulkResult,
+    BidVersionOut
+)
 from app.schemas.tender_schema import TenderStatus
+from app.serialization import validate_list
 from app.services.employee_service import EmployeeService
 from app.services.tender_service import TenderService
+from app.services.request_memo import RequestMemo, get_request_memo
+from app.services.tender_list_cache import tender_list_cache
+from app.services.version_cache import version_cache
+from app.utils import decode_cursor, check_if_match, ndjson_chunks
+from app.exceptions.base_exception import BaseExceptions
 from app.exceptions.exceptions import (
+    TenderNotFound,
+    UserNotExistOrInvalid,
     NotEnoughRights,
     BadParametersPassed,
     OrganizationNotFound,
     TenderOrBidNotFound,
     BidNotFound,
-    BidOrVersionNotFound
+    BidOrVersionNotFound,
+    VersionConflict
 )
 
 
@@ -26,13 +47,15 @@ class BidService:
             bid_history_repository: BidHistoryRepository = Depends(),
             employee_service: EmployeeService = Depends(),
             tender_service: TenderService = Depends(),
-            organization_repository: OrganizationRepository = Depends()
+            organization_repository: OrganizationRepository = Depends(),
+            memo: RequestMemo = Depends(get_request_memo)
     ):
         self.bid_repository = bid_repository
         self.bid_history_repository = bid_history_repository
         self.employee_service = employee_service
         self.tender_service = tender_service
         self.organization_repository = organization_repository
+        self.memo = memo
 
     async def _check_author_for_create_bid(
             self,
@@ -53,24 +76,85 @@ class BidService:
     async def add_bid(self, bid: NewBid) -> BidOut:
         tender = await self.tender_service.check_published_tender_by_id(bid.tender_id)
         await self._check_author_for_create_bid(bid.author_id, tender.organization_id, bid.author_type)
-        new_bid = await self.bid_repository.add_bid(**bid.model_dump())
-        await self.bid_history_repository.add_bid_history(
-            name=new_bid.name,
-            description=new_bid.description,
-            version=new_bid.version,
-            bid_id=new_bid.id
-        )
+        new_bid = await self.bid_repository.add_bid_with_history(**bid.model_dump())
         await self.bid_repository.session.commit()
         return BidOut.model_validate(new_bid)
 
+    async def add_bids(self, bids: list[NewBid]) -> list[BidBulkResult]:
+        tenders = await self.tender_service.get_tenders_by_ids({bid.tender_id for bid in bids})
+        employees = await self.employee_service.get_employees(
+            "id",
+            {bid.author_id for bid in bids if bid.author_type == AuthorType.user}
+        )
+        organization_ids = await self.organization_repository.get_existing_organization_ids(
+            {bid.author_id for bid in bids if bid.author_type == AuthorType.organization}
+        )
+        results: list[BidBulkResult | None] = [None] * len(bids)
+        positions: dict[UUID, int] = {}
+        rows = []
+        for index, bid in enumerate(bids):
+            error = self._check_bulk_bid(bid, tenders, employees, organization_ids)
+            if error is not None:
+                results[index] = BidBulkResult(index=index, status_code=error.status_code, detail=error.detail)
+                continue
+            bid_id = uuid4()
+            positions[bid_id] = index
+            rows.append({**bid.model_dump(), "id": bid_id})
+
+        for new_bid in await self.bid_repository.add_bids_with_history(rows):
+            index = positions[new_bid.id]
+            results[index] = BidBulkResult(index=index, status_code=200, bid=BidOut.model_validate(new_bid))
+        await self.bid_repository.session.commit()
+        return results
+
+    def _check_bulk_bid(
+            self,
+            bid: NewBid,
+            tenders: dict,
+            employees: dict,
+            organization_ids: set[UUID]
+    ) -> type[BaseExceptions] | None:
+        """Same checks as add_bid against rows loaded for the whole batch"""
+        tender = tenders.get(bid.tender_id)
+        if tender is None:
+            return TenderNotFound
+        if tender.status != TenderStatus.published:
+            return BadParametersPassed
+        if bid.author_type == AuthorType.user:
+            employee = employees.get(bid.author_id)
+            if employee is None:
+                return UserNotExistOrInvalid
+            if self.employee_service.check_employee_belongs_to_organization(tender.organization_id, employee):
+                return NotEnoughRights
+        else:
+            if tender.organization_id == bid.author_id:
+                return NotEnoughRights
+            if bid.author_id not in organization_ids:
+                return OrganizationNotFound
+        return None
+
     async def get_bids_for_current_user(
             self,
             limit: int,
             offset: int,
-            username: str
+            username: str,
+            cursor: str | None = None
     ) -> list[BidOut]:
-        result = await self.bid_repository.get_bids_by_username(username, limit, offset)
-        return [BidOut.model_validate(bid) for bid in result]
+        result = await self.bid_repository.get_bids_by_username(
+            username,
+            limit,
+            offset,
+            decode_cursor(cursor, str, UUID)
+        )
+        return validate_list(BidOut, result)
+
+    @staticmethod
+    async def export_bids_for_user(username: str) -> AsyncIterator[bytes]:
+        # the request session is closed before a streaming body is sent, so the export opens its own
+        async with db_connector.read_session_factory() as session:
+            bids = await BidRepository(session).stream_bids_by_username(username)
+            async for chunk in ndjson_chunks(bids, BidOut):
+                yield chunk
 
     async def get_bids_by_tender_id(
             self,
@@ -78,30 +162,66 @@ class BidService:
             username: str,
             limit: int,
             offset: int,
+            cursor: str | None = None
     ) -> list[BidOut]:
+        after = decode_cursor(cursor, str, UUID)
         employee = await self.employee_service.get_employee(username=username)
         result = await self.bid_repository.get_bids_by_tender_id_and_username(
             tender_id,
-            employee.organizations[0].organization_id if employee.organizations else None,
+            employee.organization_ids[0] if employee.organization_ids else None,
             limit,
-            offset
+            offset,
+            after
         )
-        if not result:
+        # an empty page after a cursor is the end of the list, not a missing tender
+        if not result and after is None:
             raise TenderOrBidNotFound
-        return [BidOut.model_validate(bid) for bid in result]
+        return validate_list(BidOut, result)
 
     async def get_bid_by_id(self, bid_id: UUID) -> BidRepository.model:
-        bid = await self.bid_repository.get_bid_by_id(bid_id)
+        bid = self.memo.get("bid", id=bid_id)
         if bid is None:
-            raise BidNotFound
-        return bid
+            bid = await self.bid_repository.get_bid_by_id(bid_id)
+            if bid is None:
+                raise BidNotFound
+        return self.memo.remember("bid", bid, "id")
 
-    async def get_bid_status_by_bid_id(self, bid_id: UUID, username: str) -> BidStatus:
+    async def _get_readable_bid(self, bid_id: UUID, username: str) -> Bid:
         bid = await self.get_bid_by_id(bid_id)
         if bid.status != BidStatus.published:
             await self.check_user_rights_for_actions_with_bid(bid, username)
+        return bid
+
+    async def get_bid_status_by_bid_id(self, bid_id: UUID, username: str) -> BidStatus:
+        bid = await self._get_readable_bid(bid_id, username)
         return bid.status
 
+    async def get_bid_versions(
+            self,
+            bid_id: UUID,
+            username: str,
+            limit: int,
+            cursor: str | None = None
+    ) -> list[BidVersionOut]:
+        await self._get_readable_bid(bid_id, username)
+        result = await self.bid_history_repository.get_bid_versions(bid_id, limit, decode_cursor(cursor, int))
+        versions = validate_list(BidVersionOut, result)
+        for version in versions:
+            version_cache.set(("bid", bid_id, version.version), version)
+        return versions
+
+    async def get_bid_version(self, bid_id: UUID, version: int, username: str) -> BidVersionOut:
+        await self._get_readable_bid(bid_id, username)
+        key = ("bid", bid_id, version)
+        bid_version = version_cache.get(key)
+        if bid_version is None:
+            bid_history = await self.bid_history_repository.get_bid_version(bid_id, version)
+            if bid_history is None:
+                raise BidOrVersionNotFound
+            bid_version = BidVersionOut.model_validate(bid_history)
+            version_cache.set(key, bid_version)
+        return bid_version
+
     async def change_bid_status(self, bid_id: UUID, status: str, username: str) -> BidOut:
         bid = await self.get_bid_by_bid_id_and_check_user_rights(bid_id, username)
         bid.status = status
@@ -112,20 +232,18 @@ class BidService:
             self,
             edit_fields: EditBid,
             bid_id: UUID,
-            username: str
+            username: str,
+            if_match: set[int] | None = None
     ) -> BidOut:
         edit_fields = edit_fields.model_dump(exclude_none=True)
         if not edit_fields:
             raise BadParametersPassed
         bid = await self.get_bid_by_bid_id_and_check_user_rights(bid_id, username)
-        bid.version += 1
-        await self.bid_repository.edit_bid(bid_id, **edit_fields, version=bid.version)
-        await self.bid_history_repository.add_bid_history(
-            name=bid.name,
-            description=bid.description,
-            version=bid.version,
-            bid_id=bid.id
-        )
+        expected_version = check_if_match(bid.version, if_match)
+        bid = await self.bid_repository.edit_bid_with_history(bid_id, expected_version, **edit_fields)
+        if bid is None:
+            # without a precondition nothing is returned only when the row was deleted in between
+            raise BidNotFound if expected_version is None else VersionConflict
         await self.bid_repository.session.commit()
         return BidOut.model_validate(bid)
 
@@ -138,6 +256,8 @@ class BidService:
         bid = await self.bid_repository.get_bid_for_submit_decision(bid_id)
         if not bid:
             raise BidNotFound
+        self.memo.remember("bid", bid, "id")
+        self.memo.remember("tender", bid.tender, "id")
 
         if bid.status != BidStatus.published or bid.tender.status != TenderStatus.published:
             raise NotEnoughRights
@@ -149,6 +269,7 @@ class BidService:
         bid.status = decision
         if bid.status == BidStatusDecision.approved:
             bid.tender.status = TenderStatus.closed
+            tender_list_cache.invalidate_on_commit(self.bid_repository.session.sync_session, bid.tender.service_type)
         await self.bid_repository.session.commit()
         return BidOutDecision.model_validate(bid)
 
@@ -177,21 +298,27 @@ class BidService:
         await self.check_user_rights_for_actions_with_bid(bid, username)
         return bid
 
-    async def rollback_bid_version(self, bid_id: UUID, version: int, username: str) -> BidOut:
+    async def rollback_bid_version(
+            self,
+            bid_id: UUID,
+            version: int,
+            username: str,
+            if_match: set[int] | None = None
+    ) -> BidOut:
         bid_history = await self.bid_history_repository.get_bid_history(bid_id, version)
         if not bid_history:
             raise BidOrVersionNotFound
+        self.memo.remember("bid", bid_history.bid, "id")
 
         await self.check_user_rights_for_actions_with_bid(bid_history.bid, username)
-        bid_history.bid.version += 1
-        bid_history.bid.description = bid_history.description
-        bid_history.bid.name = bid_history.name
-
-        await self.bid_history_repository.add_bid_history(
-            name=bid_history.bid.name,
-            description=bid_history.bid.description,
-            version=bid_history.bid.version,
-            bid_id=bid_history.bid.id
+        expected_version = check_if_match(bid_history.bid.version, if_match)
+        bid = await self.bid_repository.edit_bid_with_history(
+            bid_id,
+            expected_version,
+            name=bid_history.name,
+            description=bid_history.description
         )
+        if bid is None:
+            raise BidNotFound if expected_version is None else VersionConflict
         await self.bid_repository.session.commit()
-        return BidOut.model_validate(bid_history.bid)
+        return BidOut.model_validate(bid)
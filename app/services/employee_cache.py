@@ -0,0 +1,100 @@
+from dataclasses import dataclass
+from itertools import chain
+from uuid import UUID
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.cache import TTLCache
+from app.config import CacheConfig
+from app.models import Employee, OrganizationResponsible
+
+
+PENDING_INVALIDATIONS = "employee_cache_invalidations"
+
+
+@dataclass(frozen=True, slots=True)
+class EmployeeMembership:
+    id: UUID
+    username: str
+    organization_ids: tuple[UUID, ...]
+
+    @classmethod
+    def from_model(cls, employee: Employee) -> "EmployeeMembership":
+        return cls(
+            id=employee.id,
+            username=employee.username,
+            organization_ids=tuple(org_resp.organization_id for org_resp in employee.organizations)
+        )
+
+
+class EmployeeMembershipCache:
+    """
+    Process local cache of employee id/username -> (employee id, organization ids).
+    Changes made through the ORM are invalidated on commit, anything else (other workers,
+    manual edits) becomes visible after ``ttl`` seconds at most.
+    """
+
+    def __init__(self, cache_config: CacheConfig = CacheConfig()):
+        self.by_id = TTLCache(cache_config.employee_cache_size, cache_config.employee_cache_ttl)
+        self.ids_by_username = TTLCache(cache_config.employee_cache_size, cache_config.employee_cache_ttl)
+
+    def get(self, **filters) -> EmployeeMembership | None:
+        membership = None
+        if filters.keys() == {"id"}:
+            membership = self.by_id.get(filters["id"])
+        elif filters.keys() == {"username"}:
+            user_id = self.ids_by_username.get(filters["username"])
+            if user_id is not None:
+                membership = self.by_id.get(user_id)
+            if membership is not None and membership.username != filters["username"]:
+                membership = None
+        return membership
+
+    def set(self, membership: EmployeeMembership) -> None:
+        self.by_id.set(membership.id, membership)
+        self.ids_by_username.set(membership.username, membership.id)
+
+    def invalidate(self, user_id: UUID) -> None:
+        membership = self.by_id.pop(user_id)
+        if membership is not None:
+            self.ids_by_username.pop(membership.username)
+
+    def clear(self) -> None:
+        self.by_id.clear()
+        self.ids_by_username.clear()
+
+    def stats(self) -> dict[str, int]:
+        # every lookup ends in by_id unless its username is not cached, which is a miss of ids_by_username
+        return {
+            "size": len(self.by_id),
+            "hits": self.by_id.hits,
+            "misses": self.by_id.misses + self.ids_by_username.misses
+        }
+
+
+employee_cache = EmployeeMembershipCache()
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_membership_changes(session: Session, _) -> None:
+    user_ids = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, OrganizationResponsible):
+            history = inspect(obj).attrs.user_id.history
+            user_ids.update(user_id for user_id in chain(history.deleted, [obj.user_id]) if user_id is not None)
+        elif isinstance(obj, Employee):
+            user_ids.add(obj.id)
+    if user_ids:
+        session.info.setdefault(PENDING_INVALIDATIONS, set()).update(user_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_memberships(session: Session) -> None:
+    for user_id in session.info.pop(PENDING_INVALIDATIONS, ()):
+        employee_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_pending_invalidations(session: Session, _) -> None:
+    session.info.pop(PENDING_INVALIDATIONS, None)
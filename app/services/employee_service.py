@@ -2,20 +2,29 @@ from uuid import UUID
 
 from fastapi import Depends
 
+from app.database import db_connector
 from app.models import OrganizationResponsible
 from app.repositories.employee import EmployeeRepository
+from app.services.employee_cache import EmployeeMembership, employee_cache
+from app.server_timing import timed
+from app.services.request_memo import RequestMemo, get_request_memo
 from app.exceptions.exceptions import NotEnoughRights, UserNotExistOrInvalid
 
 
 class EmployeeService:
-    def __init__(self, employee_repository: EmployeeRepository = Depends()):
+    def __init__(
+            self,
+            employee_repository: EmployeeRepository = Depends(),
+            memo: RequestMemo = Depends(get_request_memo)
+    ):
         self.employee_repository = employee_repository
+        self.memo = memo
 
     async def check_and_return_employee_belongs_to_organization(
             self,
             organization_id: UUID,
             **filters
-    ) -> EmployeeRepository.model:
+    ) -> EmployeeMembership:
         employee = await self.get_employee(**filters)
         if not self.check_employee_belongs_to_organization(organization_id, employee):
             raise NotEnoughRights
@@ -25,7 +34,7 @@ class EmployeeService:
             self,
             username: str,
             organization_id: UUID
-    ) -> EmployeeRepository.model:
+    ) -> EmployeeMembership:
         return await self.check_and_return_employee_belongs_to_organization(
             organization_id,
             username=username
@@ -35,7 +44,7 @@ class EmployeeService:
             self,
             user_id: UUID,
             organization_id: UUID
-    ) -> EmployeeRepository.model:
+    ) -> EmployeeMembership:
         return await self.check_and_return_employee_belongs_to_organization(
             organization_id,
             id=user_id
@@ -44,16 +53,48 @@ class EmployeeService:
     @staticmethod
     def check_employee_belongs_to_organization(
             organization_id: UUID,
-            employee: EmployeeRepository.model
+            employee: EmployeeMembership
     ) -> bool:
-        return any(org_resp.organization_id == organization_id for org_resp in employee.organizations)
+        return organization_id in employee.organization_ids
 
-    async def get_employee(self, **filters) -> EmployeeRepository.model:
-        employee = await self.employee_repository.get_employee(**filters)
-        if not employee:
-            raise UserNotExistOrInvalid
-        return employee
+    @timed("auth")
+    async def get_employee(self, **filters) -> EmployeeMembership:
+        employee = self.memo.get("employee", **filters) or employee_cache.get(**filters)
+        if employee is None:
+            model = await self.employee_repository.get_employee(**filters)
+            if not model:
+                raise UserNotExistOrInvalid
+            employee = EmployeeMembership.from_model(model)
+            employee_cache.set(employee)
+        return self._remember(employee)
+
+    @timed("auth")
+    async def get_employees(self, column: str, values: set) -> dict:
+        """
+        Resolves many employees by "id" or "username" with at most one query for the ones not cached.
+        :return: value -> employee, values of unknown employees are missing
+        """
+        employees = {}
+        for value in values:
+            employee = self.memo.get("employee", **{column: value}) or employee_cache.get(**{column: value})
+            if employee is not None:
+                employees[value] = employee
+        missing = values - employees.keys()
+        if missing:
+            for model in await self.employee_repository.get_employees(column, missing):
+                employee = EmployeeMembership.from_model(model)
+                employee_cache.set(employee)
+                employees[getattr(employee, column)] = employee
+        for employee in employees.values():
+            self._remember(employee)
+        return employees
+
+    def _remember(self, employee: EmployeeMembership) -> EmployeeMembership:
+        # every employee resolved by a request acts in it, a committed write makes their reads stick to the primary
+        db_connector.stick_to_primary(self.employee_repository.session, employee.username)
+        return self.memo.remember("employee", employee, "id", "username")
 
+    @timed("auth")
     async def check_and_return_organization_by_user_ids(
             self,
             user_id1: UUID,
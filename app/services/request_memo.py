@@ -0,0 +1,26 @@
+from typing import Any
+
+
+class RequestMemo:
+    """
+    Lookups already made while handling the current request.
+    FastAPI caches dependencies per request, so all services built from one
+    dependency graph share a single instance and fetch an entity at most once.
+    """
+
+    def __init__(self):
+        self._entries: dict[tuple, Any] = {}
+
+    def get(self, kind: str, **filters) -> Any | None:
+        if len(filters) != 1:
+            return None
+        return self._entries.get((kind, *next(iter(filters.items()))))
+
+    def remember(self, kind: str, value: Any, *fields: str) -> Any:
+        for field in fields:
+            self._entries[(kind, field, getattr(value, field))] = value
+        return value
+
+
+async def get_request_memo() -> RequestMemo:
+    return RequestMemo()
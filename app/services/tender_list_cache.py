@@ -0,0 +1,97 @@
+import hashlib
+from dataclasses import dataclass
+from typing import Hashable, Iterable
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.cache import TTLCache
+from app.config import CacheConfig
+from app.schemas.tender_schema import ServiceType
+
+
+PENDING_INVALIDATIONS = "tender_list_cache_invalidations"
+# stands for a page requested without the service_type filter, it contains tenders of every type
+ALL_SERVICE_TYPES = None
+
+
+@dataclass(frozen=True, slots=True)
+class CachedPage:
+    body: bytes
+    etag: str
+    next_cursor: str | None
+
+
+def page_key(
+        service_type: Iterable[str] | None,
+        limit: int | None,
+        offset: int | None,
+        cursor: str | None
+) -> Hashable:
+    # the model stores plain strings and enum members hash by name, so both sides are normalized to ServiceType
+    service_types = frozenset(map(ServiceType, service_type)) if service_type else ALL_SERVICE_TYPES
+    return service_types, limit, offset, cursor
+
+
+def body_etag(body: bytes) -> str:
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(etag: str, if_none_match: str | None) -> bool:
+    """If-None-Match uses the weak comparison, so W/ prefixes are ignored"""
+    if if_none_match is None:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+
+class TenderListCache:
+    """
+    Process local cache of serialized published tender pages.
+    Writes touching a published tender drop the pages of its service type once their transaction commits.
+    """
+
+    def __init__(self, cache_config: CacheConfig = CacheConfig()):
+        self.pages = TTLCache(cache_config.tender_list_cache_size, cache_config.tender_list_cache_ttl)
+        # bumped by every invalidation, a page read before it is not stored afterwards
+        self.generation = 0
+
+    def get(self, key: Hashable) -> CachedPage | None:
+        return self.pages.get(key)
+
+    def set(self, key: Hashable, page: CachedPage, generation: int) -> None:
+        if generation == self.generation:
+            self.pages.set(key, page)
+
+    def invalidate(self, service_types: Iterable[str]) -> None:
+        service_types = set(service_types)
+        self.generation += 1
+        for key in self.pages.keys():
+            key_service_types = key[0]
+            if key_service_types is ALL_SERVICE_TYPES or not key_service_types.isdisjoint(service_types):
+                self.pages.pop(key)
+
+    def invalidate_on_commit(self, session: Session, *service_types: str) -> None:
+        session.info.setdefault(PENDING_INVALIDATIONS, set()).update(map(ServiceType, service_types))
+
+    def clear(self) -> None:
+        self.generation += 1
+        self.pages.clear()
+
+    def stats(self) -> dict[str, int]:
+        return self.pages.stats()
+
+
+tender_list_cache = TenderListCache()
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_pages(session: Session) -> None:
+    service_types = session.info.pop(PENDING_INVALIDATIONS, None)
+    if service_types:
+        tender_list_cache.invalidate(service_types)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_pending_invalidations(session: Session, _) -> None:
+    session.info.pop(PENDING_INVALIDATIONS, None)
@@ -1,13 +1,39 @@
-from uuid import UUID
+from typing import AsyncIterator
+from uuid import UUID, uuid4
 
 from fastapi import Depends
 
+from app.database import db_connector
 from app.models import Tender
 from app.repositories.tender import TenderRepository, TenderHistoryRepository
+from app.serialization import list_adapter, validate_list
 from app.services.employee_service import EmployeeService
-from app.schemas.tender_schema import NewTender, TenderOut, TenderStatus, EditTender
-from app.exceptions.exceptions import TenderNotFound, NotEnoughRights, BadParametersPassed, TenderOrVersionNotFound
-from app.utils import model_to_dict
+from app.services.request_memo import RequestMemo, get_request_memo
+from app.services.version_cache import version_cache
+from app.services.tender_list_cache import (
+    CachedPage,
+    tender_list_cache,
+    page_key,
+    body_etag
+)
+from app.schemas.tender_schema import (
+    NewTender,
+    TenderOut,
+    TenderStatus,
+    EditTender,
+    TenderBulkResult,
+    TenderSearchResult,
+    TenderVersionOut
+)
+from app.exceptions.exceptions import (
+    TenderNotFound,
+    UserNotExistOrInvalid,
+    NotEnoughRights,
+    BadParametersPassed,
+    TenderOrVersionNotFound,
+    VersionConflict
+)
+from app.utils import decode_cursor, next_cursor, check_if_match, ndjson_chunks
 
 
 class TenderService:
@@ -15,64 +41,200 @@ class TenderService:
             self,
             tender_repository: TenderRepository = Depends(),
             tender_history_repository: TenderHistoryRepository = Depends(),
-            employee_service: EmployeeService = Depends()
+            employee_service: EmployeeService = Depends(),
+            memo: RequestMemo = Depends(get_request_memo)
     ):
         self.tender_repository = tender_repository
         self.tender_history_repository = tender_history_repository
         self.employee_service = employee_service
+        self.memo = memo
 
     async def add_tender(self, tender: NewTender) -> TenderOut:
         employee = await self.employee_service.check_and_return_employee_belongs_to_organization_by_username(
             tender.creator_username,
             tender.organization_id
         )
-        new_tender = await self.tender_repository.add_tender(
+        new_tender = await self.tender_repository.add_tender_with_history(
             **tender.model_dump(exclude={'creator_username'}),
             employee_id=employee.id
         )
-        await self.tender_history_repository.add_tender_history(
-            **model_to_dict(new_tender, "id", "status", "created_at"),
-            tender_id=new_tender.id,
-        )
         await self.tender_repository.session.commit()
         return TenderOut.model_validate(new_tender)
 
+    async def add_tenders(self, tenders: list[NewTender]) -> list[TenderBulkResult]:
+        employees = await self.employee_service.get_employees(
+            "username",
+            {tender.creator_username for tender in tenders}
+        )
+        results: list[TenderBulkResult | None] = [None] * len(tenders)
+        positions: dict[UUID, int] = {}
+        rows = []
+        for index, tender in enumerate(tenders):
+            employee = employees.get(tender.creator_username)
+            if employee is None:
+                error = UserNotExistOrInvalid
+            elif not self.employee_service.check_employee_belongs_to_organization(tender.organization_id, employee):
+                error = NotEnoughRights
+            else:
+                tender_id = uuid4()
+                positions[tender_id] = index
+                rows.append({
+                    **tender.model_dump(exclude={'creator_username'}),
+                    "id": tender_id,
+                    "employee_id": employee.id
+                })
+                continue
+            results[index] = TenderBulkResult(index=index, status_code=error.status_code, detail=error.detail)
+
+        for new_tender in await self.tender_repository.add_tenders_with_history(rows):
+            index = positions[new_tender.id]
+            results[index] = TenderBulkResult(index=index, status_code=200, tender=TenderOut.model_validate(new_tender))
+        await self.tender_repository.session.commit()
+        return results
+
     async def get_published_tenders(
             self,
             limit: int,
             offset: int,
-            service_type: list[str] | None = None
+            service_type: list[str] | None = None,
+            cursor: str | None = None
     ) -> list[TenderOut]:
-        result = await self.tender_repository.get_published_tenders(limit, offset, service_type)
-        return [TenderOut.model_validate(tender) for tender in result]
+        result = await self.tender_repository.get_published_tenders(
+            limit,
+            offset,
+            service_type,
+            decode_cursor(cursor, str, UUID)
+        )
+        return validate_list(TenderOut, result)
+
+    async def get_published_tenders_page(
+            self,
+            limit: int,
+            offset: int,
+            service_type: list[str] | None = None,
+            cursor: str | None = None
+    ) -> CachedPage:
+        key = page_key(service_type, limit, offset, cursor)
+        page = tender_list_cache.get(key)
+        if page is None:
+            generation = tender_list_cache.generation
+            # a replica lagging behind the commit that dropped the page would put the old page back until the TTL
+            async with db_connector.primary_session(self.tender_repository.session) as session:
+                result = await TenderRepository(session).get_published_tenders(
+                    limit,
+                    offset,
+                    service_type,
+                    decode_cursor(cursor, str, UUID)
+                )
+            tenders = validate_list(TenderOut, result)
+            body = list_adapter(TenderOut).dump_json(tenders)
+            page = CachedPage(body, body_etag(body), next_cursor(tenders, limit, "name", "id"))
+            tender_list_cache.set(key, page, generation)
+        return page
+
+    def _invalidate_published_pages(self, *statuses: str, service_types: tuple[str, ...]) -> None:
+        if TenderStatus.published in statuses:
+            tender_list_cache.invalidate_on_commit(self.tender_repository.session.sync_session, *service_types)
+
+    async def search_published_tenders(
+            self,
+            query: str,
+            limit: int,
+            service_type: list[str] | None = None,
+            cursor: str | None = None
+    ) -> list[TenderSearchResult]:
+        result = await self.tender_repository.search_published_tenders(
+            query,
+            limit,
+            service_type,
+            decode_cursor(cursor, float, UUID)
+        )
+        return [
+            TenderSearchResult(**TenderOut.model_validate(tender).model_dump(), rank=rank)
+            for tender, rank in result
+        ]
+
+    @staticmethod
+    async def export_published_tenders(service_type: list[str] | None = None) -> AsyncIterator[bytes]:
+        # the request session is closed before a streaming body is sent, so the export opens its own
+        async with db_connector.read_session_factory() as session:
+            tenders = await TenderRepository(session).stream_published_tenders(service_type)
+            async for chunk in ndjson_chunks(tenders, TenderOut):
+                yield chunk
 
     async def get_tenders_for_current_user(
             self,
             limit: int,
             offset: int,
-            username: str
+            username: str,
+            cursor: str | None = None
     ) -> list[TenderOut]:
         if username is None:
-            return await self.get_published_tenders(limit, offset)
-        result = await self.tender_repository.get_tender_by_username(username, limit, offset)
-        return [TenderOut.model_validate(tender) for tender in result]
+            return await self.get_published_tenders(limit, offset, cursor=cursor)
+        result = await self.tender_repository.get_tender_by_username(
+            username,
+            limit,
+            offset,
+            decode_cursor(cursor, str, UUID)
+        )
+        return validate_list(TenderOut, result)
 
     async def get_tender_by_id(self, tender_id: UUID) -> Tender:
-        tender = await self.tender_repository.get_tender_by_id(tender_id)
+        tender = self.memo.get("tender", id=tender_id)
         if tender is None:
-            raise TenderNotFound
-        return tender
+            tender = await self.tender_repository.get_tender_by_id(tender_id)
+            if tender is None:
+                raise TenderNotFound
+        return self.memo.remember("tender", tender, "id")
 
-    async def get_tender_status_by_tender_id(self, tender_id: UUID, username: str) -> TenderStatus:
+    async def get_tenders_by_ids(self, tender_ids: set[UUID]) -> dict[UUID, Tender]:
+        tenders = await self.tender_repository.get_tenders_by_ids(tender_ids)
+        return {tender.id: self.memo.remember("tender", tender, "id") for tender in tenders}
+
+    async def _get_readable_tender(self, tender_id: UUID, username: str | None) -> Tender:
         tender = await self.get_tender_by_id(tender_id)
         if username is not None:
             employee = await self.employee_service.get_employee(username=username)
             if self.employee_service.check_employee_belongs_to_organization(tender.organization_id, employee):
-                return tender.status
+                return tender
         if tender.status == TenderStatus.published:
-            return tender.status
+            return tender
         raise NotEnoughRights
 
+    async def get_tender_status_by_tender_id(self, tender_id: UUID, username: str) -> TenderStatus:
+        tender = await self._get_readable_tender(tender_id, username)
+        return tender.status
+
+    async def get_tender_versions(
+            self,
+            tender_id: UUID,
+            username: str | None,
+            limit: int,
+            cursor: str | None = None
+    ) -> list[TenderVersionOut]:
+        await self._get_readable_tender(tender_id, username)
+        result = await self.tender_history_repository.get_tender_versions(
+            tender_id,
+            limit,
+            decode_cursor(cursor, int)
+        )
+        versions = validate_list(TenderVersionOut, result)
+        for version in versions:
+            version_cache.set(("tender", tender_id, version.version), version)
+        return versions
+
+    async def get_tender_version(self, tender_id: UUID, version: int, username: str | None) -> TenderVersionOut:
+        await self._get_readable_tender(tender_id, username)
+        key = ("tender", tender_id, version)
+        tender_version = version_cache.get(key)
+        if tender_version is None:
+            tender_history = await self.tender_history_repository.get_tender_version(tender_id, version)
+            if tender_history is None:
+                raise TenderOrVersionNotFound
+            tender_version = TenderVersionOut.model_validate(tender_history)
+            version_cache.set(key, tender_version)
+        return tender_version
+
     async def _get_tender_with_check_user(self, tender_id: UUID, username: str) -> Tender:
         tender = await self.get_tender_by_id(tender_id)
         await self.employee_service.check_and_return_employee_belongs_to_organization_by_username(
@@ -88,6 +250,7 @@ class TenderService:
             username: str
     ) -> TenderOut:
         tender = await self._get_tender_with_check_user(tender_id, username)
+        self._invalidate_published_pages(tender.status, status, service_types=(tender.service_type,))
         tender.status = status
         await self.tender_repository.session.commit()
         return TenderOut.model_validate(tender)
@@ -96,39 +259,56 @@ class TenderService:
             self,
             edit_fields: EditTender,
             tender_id: UUID,
-            username: str
+            username: str,
+            if_match: set[int] | None = None
     ) -> TenderOut:
         edit_fields = edit_fields.model_dump(exclude_none=True)
         if not edit_fields:
             raise BadParametersPassed
         tender = await self._get_tender_with_check_user(tender_id, username)
-        tender.version += 1
-        await self.tender_repository.edit_tender(tender_id, **edit_fields, version=tender.version)
-        await self.tender_history_repository.add_tender_history(
-            **model_to_dict(tender, "id", "status", "created_at"),
-            tender_id=tender.id,
+        self._invalidate_published_pages(
+            tender.status,
+            service_types=(tender.service_type, edit_fields.get("service_type", tender.service_type))
         )
+        expected_version = check_if_match(tender.version, if_match)
+        tender = await self.tender_repository.edit_tender_with_history(tender_id, expected_version, **edit_fields)
+        if tender is None:
+            # without a precondition nothing is returned only when the row was deleted in between
+            raise TenderNotFound if expected_version is None else VersionConflict
         await self.tender_repository.session.commit()
         return TenderOut.model_validate(tender)
 
-    async def rollback_tender_version(self, tender_id: UUID, version: int, username: str) -> TenderOut:
+    async def rollback_tender_version(
+            self,
+            tender_id: UUID,
+            version: int,
+            username: str,
+            if_match: set[int] | None = None
+    ) -> TenderOut:
         tender_history = await self.tender_history_repository.get_tender_history(tender_id, version)
         if not tender_history:
             raise TenderOrVersionNotFound
+        self.memo.remember("tender", tender_history.tender, "id")
         await self.employee_service.check_and_return_employee_belongs_to_organization_by_username(
             username,
             tender_history.organization_id
         )
-        tender_history.tender.version += 1
-        tender_history.tender.description = tender_history.description
-        tender_history.tender.service_type = tender_history.service_type
-        tender_history.tender.name = tender_history.name
-        await self.tender_history_repository.add_tender_history(
-            **model_to_dict(tender_history, "id", "status", "created_at", "version"),
-            version=tender_history.tender.version
+        self._invalidate_published_pages(
+            tender_history.tender.status,
+            service_types=(tender_history.tender.service_type, tender_history.service_type)
+        )
+        expected_version = check_if_match(tender_history.tender.version, if_match)
+        tender = await self.tender_repository.edit_tender_with_history(
+            tender_id,
+            expected_version,
+            name=tender_history.name,
+            description=tender_history.description,
+            service_type=tender_history.service_type
         )
+        if tender is None:
+            raise TenderNotFound if expected_version is None else VersionConflict
         await self.tender_repository.session.commit()
-        return TenderOut.model_validate(tender_history.tender)
+        return TenderOut.model_validate(tender)
 
     async def check_published_tender_by_id(self, tender_id: UUID) -> Tender:
         tender = await self.get_tender_by_id(tender_id)
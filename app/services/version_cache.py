@@ -0,0 +1,7 @@
+from app.cache import TTLCache
+from app.config import CacheConfig
+
+
+# (kind, entity id, version) -> serialized version, shared by tenders and bids
+cache_config = CacheConfig()
+version_cache = TTLCache(cache_config.version_cache_size, cache_config.version_cache_ttl)
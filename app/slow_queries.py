@@ -0,0 +1,174 @@
+import asyncio
+import atexit
+import json
+import logging
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+from queue import SimpleQueue
+from types import FrameType
+from typing import Iterator
+
+from greenlet import getcurrent
+from sqlalchemy import URL, event, text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.config import SlowQueryConfig
+from app.query_counter import current_query_counter
+
+
+def _shape(value) -> str:
+    if isinstance(value, (list, tuple, set, frozenset)):
+        item = type(next(iter(value))).__name__ if value else ""
+        return f"{type(value).__name__}[{item}]({len(value)})"
+    if isinstance(value, (str, bytes)):
+        return f"{type(value).__name__}({len(value)})"
+    return type(value).__name__
+
+
+def parameter_shapes(parameters, executemany: bool) -> list[str] | dict[str, str]:
+    """Types and sizes of the bound values, the values themselves may be personal data"""
+    if executemany:
+        parameters = parameters[0] if parameters else ()
+    if isinstance(parameters, dict):
+        return {name: _shape(value) for name, value in parameters.items()}
+    return [_shape(value) for value in parameters or ()]
+
+
+def _frames() -> Iterator[FrameType]:
+    # statements run in a greenlet spawned by the async session, the awaiting coroutines
+    # (services, repositories) are on the stack of the greenlet it switched from
+    frame = sys._getframe(1)
+    current = getcurrent()
+    while True:
+        while frame is not None:
+            yield frame
+            frame = frame.f_back
+        current = current.parent
+        if current is None:
+            return
+        frame = current.gr_frame
+
+
+def calling_repository_method() -> str | None:
+    """The outermost method of the innermost chain of *Repository frames, i.e. the one a service called"""
+    found = None
+    for frame in _frames():
+        qualname = frame.f_code.co_qualname
+        if qualname.partition(".")[0].endswith("Repository"):
+            found = f"{qualname} ({Path(frame.f_code.co_filename).name}:{frame.f_lineno})"
+        elif found is not None:
+            return found
+    return found
+
+
+class SlowQueryRecorder:
+    """
+    Writes statements slower than the threshold to a rotating JSON lines file together with their
+    parameter shapes, the calling repository method and the route. A sample of slow SELECTs is re-run
+    with EXPLAIN (ANALYZE, BUFFERS) in a background task on a connection outside the application pool,
+    in a transaction that is always rolled back.
+    """
+
+    def __init__(self, config: SlowQueryConfig):
+        self.threshold = config.slow_query_threshold_ms / 1000
+        self.explain_rate = config.slow_query_explain_rate
+        self.explain_timeout_ms = config.slow_query_explain_timeout_ms
+        # one NullPool engine per database server, created on the first EXPLAIN
+        self._explain_engines: dict[URL, AsyncEngine] = {}
+        self._explaining = False
+        self._tasks: set[asyncio.Task] = set()
+
+        path = Path(config.slow_query_log_file)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        file_handler = RotatingFileHandler(
+            path,
+            maxBytes=config.slow_query_log_max_bytes,
+            backupCount=config.slow_query_log_backups,
+            encoding="utf-8"
+        )
+        # the file is written by the listener thread, the event loop only puts records into the queue
+        queue = SimpleQueue()
+        self._listener = QueueListener(queue, file_handler)
+        self._listener.start()
+        atexit.register(self._listener.stop)
+        self.logger = logging.getLogger(__name__)
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+        self.logger.addHandler(QueueHandler(queue))
+
+    def install(self, engine: AsyncEngine) -> None:
+        event.listen(engine.sync_engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine.sync_engine, "after_cursor_execute", self._after_cursor_execute)
+
+    @staticmethod
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+        if context is not None:
+            context.slow_query_started_at = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        started_at = getattr(context, "slow_query_started_at", None)
+        if started_at is None:
+            return
+        duration = time.perf_counter() - started_at
+        if duration < self.threshold:
+            return
+        counter = current_query_counter.get()
+        record = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "duration_ms": round(duration * 1000, 3),
+            "route": counter.route if counter is not None else None,
+            "repository_method": calling_repository_method(),
+            "statement": statement,
+            "parameters": parameter_shapes(parameters, executemany),
+            "executemany": executemany,
+        }
+        if self._should_explain(statement, executemany):
+            self._explaining = True
+            task = asyncio.get_running_loop().create_task(
+                self._explain(conn.engine.url, record, statement, parameters)
+            )
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        else:
+            self._write(record)
+
+    def _should_explain(self, statement: str, executemany: bool) -> bool:
+        # one EXPLAIN at a time, a burst of slow queries must not double the load on the database
+        return (
+            not self._explaining
+            and not executemany
+            and statement.lstrip()[:6].upper() == "SELECT"
+            and random.random() < self.explain_rate
+        )
+
+    async def _explain(self, url: URL, record: dict, statement: str, parameters) -> None:
+        if url not in self._explain_engines:
+            # without statement caches, so it also works behind PgBouncer in transaction pooling mode
+            self._explain_engines[url] = create_async_engine(
+                url,
+                poolclass=NullPool,
+                connect_args={"prepared_statement_cache_size": 0, "statement_cache_size": 0}
+            )
+        try:
+            async with self._explain_engines[url].connect() as conn:
+                async with conn.begin() as transaction:
+                    await conn.execute(text(f"SET LOCAL statement_timeout = {int(self.explain_timeout_ms)}"))
+                    result = await conn.exec_driver_sql(
+                        f"EXPLAIN (ANALYZE, BUFFERS) {statement}",
+                        tuple(parameters) if isinstance(parameters, list) else parameters
+                    )
+                    record["explain"] = [row[0] for row in result]
+                    await transaction.rollback()
+        except Exception as err:
+            record["explain_error"] = repr(err)
+        finally:
+            self._explaining = False
+            self._write(record)
+
+    def _write(self, record: dict) -> None:
+        self.logger.info(json.dumps(record, ensure_ascii=False, default=str))
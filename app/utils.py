@@ -1,3 +1,13 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from typing import AsyncIterator
+from uuid import UUID
+
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncScalarResult
+
+from app.exceptions.exceptions import BadParametersPassed, VersionPreconditionFailed
+
 
 def model_to_dict(model, *exclude_fields):
     return {
@@ -5,3 +15,67 @@ def model_to_dict(model, *exclude_fields):
         for column in model.__table__.columns
         if column.name not in exclude_fields
     }
+
+
+def encode_cursor(*values) -> str:
+    raw = json.dumps([str(value) if isinstance(value, UUID) else value for value in values], separators=(",", ":"))
+    return urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str | None, *types) -> tuple | None:
+    if cursor is None:
+        return None
+    try:
+        values = json.loads(urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError(cursor)
+        return tuple(type_(value) for type_, value in zip(types, values))
+    except (ValueError, TypeError, AttributeError):
+        raise BadParametersPassed
+
+
+def next_cursor(items: list, limit: int | None, *fields: str) -> str | None:
+    if not items or limit is None or len(items) < limit:
+        return None
+    return encode_cursor(*(getattr(items[-1], field) for field in fields))
+
+
+async def ndjson_chunks(rows: AsyncScalarResult, schema: type[BaseModel]) -> AsyncIterator[bytes]:
+    """Serializes streamed rows one batch at a time, one JSON object per line"""
+    async for batch in rows.partitions():
+        yield "".join(schema.model_validate(row).model_dump_json() + "\n" for row in batch).encode()
+
+
+# historical versions are never rewritten, access to them still depends on the user
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+
+def make_etag(version: int) -> str:
+    return f'"{version}"'
+
+
+def make_version_etag(version: int) -> str:
+    """A historical version is a different representation than the live entity of the same version"""
+    return f'"v{version}"'
+
+
+def parse_if_match(header: str | None) -> set[int] | None:
+    if header is None or header.strip() == "*":
+        return None
+    versions = set()
+    for tag in header.split(","):
+        tag = tag.strip()
+        if len(tag) > 2 and tag[0] == tag[-1] == '"' and tag[1:-1].isdigit():
+            versions.add(int(tag[1:-1]))
+    return versions
+
+
+def check_if_match(current_version: int, if_match: set[int] | None) -> int | None:
+    """
+    :return: version the conditional update must match or None when no precondition was sent
+    """
+    if if_match is None:
+        return None
+    if current_version not in if_match:
+        raise VersionPreconditionFailed
+    return current_version
@@ -0,0 +1,193 @@
+import argparse
+import asyncio
+import json
+from dataclasses import asdict
+from pathlib import Path
+
+from benchmark.bulk import compare_bulk, print_bulk_results
+from benchmark.load import load_fixtures, run_load
+from benchmark.report import summarize, write_report, print_report, compare_reports
+from benchmark.scaling import run_scaling, print_scaling_results
+from benchmark.search import count_tenders, run_search, print_search_results
+from benchmark.serialization import run_serialization, print_serialization_results
+from benchmark.startup import run_startup, print_startup_results
+from benchmark.seed import SeedVolumes, seed
+
+
+def _seed(args: argparse.Namespace) -> None:
+    volumes = SeedVolumes(
+        organizations=args.organizations,
+        employees_per_organization=args.employees,
+        tenders=args.tenders,
+        bids=args.bids,
+        versions=args.versions
+    )
+    counts = asyncio.run(seed(volumes, truncate=args.truncate, seed_value=args.seed))
+    print(json.dumps(counts, indent=2))
+
+
+async def _run_load(args: argparse.Namespace) -> None:
+    fixtures = await load_fixtures(args.sample_size)
+    samples, elapsed = await run_load(
+        args.base_url,
+        fixtures,
+        concurrency=args.concurrency,
+        duration=args.duration,
+        warmup=args.warmup,
+        write_weight=args.write_weight,
+        seed=args.seed
+    )
+    report = write_report(
+        args.output,
+        summarize(samples, elapsed),
+        base_url=args.base_url,
+        concurrency=args.concurrency,
+        duration_s=round(elapsed, 3),
+        write_weight=args.write_weight
+    )
+    print_report(report)
+    print(f"\nResults written to {args.output}")
+
+
+async def _bulk(args: argparse.Namespace) -> None:
+    fixtures = await load_fixtures(args.sample_size)
+    results = await compare_bulk(
+        args.base_url,
+        fixtures,
+        items=args.items,
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        seed=args.seed
+    )
+    print_bulk_results(results)
+
+
+async def _search(args: argparse.Namespace) -> None:
+    tenders = await count_tenders()
+    if tenders < args.min_tenders:
+        raise SystemExit(
+            f"Only {tenders} tenders seeded, run 'python -m benchmark seed --tenders {args.min_tenders}' first"
+        )
+    summary = await run_search(
+        args.base_url,
+        requests=args.requests,
+        concurrency=args.concurrency,
+        limit=args.limit,
+        pages=args.pages,
+        seed=args.seed
+    )
+    print_search_results(tenders, summary)
+
+
+def _serialization(args: argparse.Namespace) -> None:
+    print_serialization_results(run_serialization(tuple(args.rows), repeat=args.repeat, number=args.number))
+
+
+def _startup(args: argparse.Namespace) -> None:
+    app_dirs = {"current": Path.cwd()}
+    if args.baseline:
+        app_dirs["baseline"] = args.baseline.resolve()
+    print_startup_results(run_startup(app_dirs, runs=args.runs))
+
+
+async def _scaling(args: argparse.Namespace) -> None:
+    fixtures = await load_fixtures(args.sample_size)
+    results = await run_scaling(
+        fixtures,
+        args.workers,
+        concurrency=args.concurrency,
+        duration=args.duration,
+        warmup=args.warmup,
+        seed=args.seed
+    )
+    print_scaling_results(results)
+
+
+def _compare(args: argparse.Namespace) -> None:
+    compare_reports(json.loads(args.base.read_text()), json.loads(args.head.read_text()))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmark", description="Tender Management API benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed_parser = commands.add_parser("seed", help="fill the configured database with benchmark data")
+    defaults = asdict(SeedVolumes())
+    seed_parser.add_argument("--organizations", type=int, default=defaults["organizations"])
+    seed_parser.add_argument("--employees", type=int, default=defaults["employees_per_organization"],
+                             help="employees per organization")
+    seed_parser.add_argument("--tenders", type=int, default=defaults["tenders"])
+    seed_parser.add_argument("--bids", type=int, default=defaults["bids"])
+    seed_parser.add_argument("--versions", type=int, default=defaults["versions"],
+                             help="history rows per tender and bid")
+    seed_parser.add_argument("--truncate", action="store_true", help="remove existing rows first")
+    seed_parser.add_argument("--seed", type=int, default=0)
+    seed_parser.set_defaults(handler=_seed)
+
+    run_parser = commands.add_parser("run", help="replay the read/write mix against a running server")
+    run_parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    run_parser.add_argument("--concurrency", type=int, default=16)
+    run_parser.add_argument("--duration", type=float, default=30.0, help="measured seconds")
+    run_parser.add_argument("--warmup", type=float, default=3.0, help="seconds excluded from the results")
+    run_parser.add_argument("--write-weight", type=float, default=1.0,
+                            help="multiplier for the weight of write operations in the mix")
+    run_parser.add_argument("--sample-size", type=int, default=1_000, help="rows used to build requests")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--output", type=Path, default=Path("benchmark_results/latest.json"))
+    run_parser.set_defaults(handler=lambda args: asyncio.run(_run_load(args)))
+
+    bulk_parser = commands.add_parser("bulk", help="compare bulk creation endpoints with the single item ones")
+    bulk_parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    bulk_parser.add_argument("--items", type=int, default=1_000, help="tenders and bids created by each path")
+    bulk_parser.add_argument("--batch-size", type=int, default=500, help="items per bulk request")
+    bulk_parser.add_argument("--concurrency", type=int, default=16, help="parallel clients of the single item path")
+    bulk_parser.add_argument("--sample-size", type=int, default=1_000, help="rows used to build requests")
+    bulk_parser.add_argument("--seed", type=int, default=0)
+    bulk_parser.set_defaults(handler=lambda args: asyncio.run(_bulk(args)))
+
+    search_parser = commands.add_parser("search", help="measure /api/tenders/search latency on a large table")
+    search_parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    search_parser.add_argument("--requests", type=int, default=200, help="searches per query shape")
+    search_parser.add_argument("--concurrency", type=int, default=8)
+    search_parser.add_argument("--limit", type=int, default=20)
+    search_parser.add_argument("--pages", type=int, default=3, help="cursor pages followed per search")
+    search_parser.add_argument("--min-tenders", type=int, default=1_000_000,
+                               help="refuse to run against a smaller table")
+    search_parser.add_argument("--seed", type=int, default=0)
+    search_parser.set_defaults(handler=lambda args: asyncio.run(_search(args)))
+
+    serialization_parser = commands.add_parser(
+        "serialization", help="compare list response serialization paths without a database"
+    )
+    serialization_parser.add_argument("--rows", type=int, nargs="+", default=[100, 1_000], help="page sizes")
+    serialization_parser.add_argument("--repeat", type=int, default=5)
+    serialization_parser.add_argument("--number", type=int, default=20, help="renders per timing")
+    serialization_parser.set_defaults(handler=_serialization)
+
+    startup_parser = commands.add_parser(
+        "startup", help="measure the time from process start to the first answered request"
+    )
+    startup_parser.add_argument("--runs", type=int, default=5)
+    startup_parser.add_argument("--baseline", type=Path, help="checkout of another commit measured for comparison")
+    startup_parser.set_defaults(handler=_startup)
+
+    scaling_parser = commands.add_parser("scaling", help="start python -m app.server with 1..N workers and load it")
+    scaling_parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    scaling_parser.add_argument("--concurrency", type=int, default=64)
+    scaling_parser.add_argument("--duration", type=float, default=30.0, help="measured seconds per worker count")
+    scaling_parser.add_argument("--warmup", type=float, default=3.0, help="seconds excluded from the results")
+    scaling_parser.add_argument("--sample-size", type=int, default=1_000, help="rows used to build requests")
+    scaling_parser.add_argument("--seed", type=int, default=0)
+    scaling_parser.set_defaults(handler=lambda args: asyncio.run(_scaling(args)))
+
+    compare_parser = commands.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("base", type=Path)
+    compare_parser.add_argument("head", type=Path)
+    compare_parser.set_defaults(handler=_compare)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
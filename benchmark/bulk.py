@@ -0,0 +1,87 @@
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+
+import httpx
+
+from benchmark.load import Fixtures, new_tender, new_bid
+
+
+@dataclass
+class BulkResult:
+    entity: str
+    path: str
+    items: int
+    created: int
+    requests: int
+    seconds: float
+
+    @property
+    def items_per_second(self) -> float:
+        return self.items / self.seconds if self.seconds else 0.0
+
+
+def _items(fixtures: Fixtures, entity: str, count: int, rng: random.Random) -> list[dict]:
+    build = new_tender if entity == "tenders" else new_bid
+    return [build(fixtures, rng).json for _ in range(count)]
+
+
+async def _single(http: httpx.AsyncClient, entity: str, items: list[dict], concurrency: int) -> tuple[int, int]:
+    queue = iter(items)
+    created = 0
+
+    async def worker() -> None:
+        nonlocal created
+        for item in queue:
+            response = await http.post(f"/api/{entity}/new", json=item)
+            created += response.status_code == 200
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return created, len(items)
+
+
+async def _bulk(http: httpx.AsyncClient, entity: str, items: list[dict], batch_size: int) -> tuple[int, int]:
+    created = requests = 0
+    for start in range(0, len(items), batch_size):
+        response = await http.post(f"/api/{entity}/bulk", json=items[start:start + batch_size])
+        response.raise_for_status()
+        created += sum(result["status_code"] == 200 for result in response.json())
+        requests += 1
+    return created, requests
+
+
+async def compare_bulk(
+        base_url: str,
+        fixtures: Fixtures,
+        items: int = 1_000,
+        batch_size: int = 500,
+        concurrency: int = 16,
+        seed: int = 0
+) -> list[BulkResult]:
+    """
+    Creates the same number of tenders and bids through the single item endpoints (with ``concurrency``
+    parallel clients) and through the bulk endpoints (batches sent one after another).
+    """
+    rng = random.Random(seed)
+    results = []
+    async with httpx.AsyncClient(base_url=base_url, timeout=120.0) as http:
+        for entity in ("tenders", "bids"):
+            payload = _items(fixtures, entity, items, rng)
+            for path in ("single", "bulk"):
+                started_at = time.perf_counter()
+                if path == "single":
+                    created, requests = await _single(http, entity, payload, concurrency)
+                else:
+                    created, requests = await _bulk(http, entity, payload, batch_size)
+                results.append(BulkResult(entity, path, items, created, requests, time.perf_counter() - started_at))
+    return results
+
+
+def print_bulk_results(results: list[BulkResult]) -> None:
+    print(f"{'entity':<8} {'path':<7} {'items':>7} {'created':>8} {'requests':>9} {'seconds':>9} {'items/s':>9}")
+    for result in results:
+        print(
+            f"{result.entity:<8} {result.path:<7} {result.items:>7} {result.created:>8} {result.requests:>9} "
+            f"{result.seconds:>9.3f} {result.items_per_second:>9.1f}"
+        )
@@ -0,0 +1,281 @@
+import asyncio
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+from uuid import UUID
+
+import httpx
+from sqlalchemy import text
+
+from app.database import db_connector
+
+
+@dataclass
+class TenderFixture:
+    id: UUID
+    organization_id: UUID
+    service_type: str
+    username: str
+
+
+@dataclass
+class BidFixture:
+    id: UUID
+    tender_id: UUID
+    author_id: UUID
+    author_username: str
+    tender_username: str
+
+
+@dataclass
+class Fixtures:
+    tenders: list[TenderFixture]
+    bids: list[BidFixture]
+
+
+@dataclass
+class Call:
+    route: str
+    method: str
+    url: str
+    params: dict = field(default_factory=dict)
+    json: dict | list | None = None
+
+
+@dataclass
+class Sample:
+    route: str
+    status: int
+    latency: float
+    queries: int | None
+
+
+@dataclass
+class Operation:
+    weight: float
+    write: bool
+    build: Callable[[Fixtures, random.Random], Call]
+
+
+async def load_fixtures(sample_size: int = 1_000) -> Fixtures:
+    """
+    Picks existing rows that requests of the load mix can be built from:
+    published tenders with a responsible employee and bids on them with their authors.
+    """
+    async with db_connector.engine.connect() as conn:
+        tenders = await conn.execute(text(
+            "SELECT t.id, t.organization_id, t.service_type, e.username "
+            "FROM tender t JOIN employee e ON e.id = t.employee_id "
+            "WHERE t.status = 'Published' LIMIT :limit"
+        ), {"limit": sample_size})
+        bids = await conn.execute(text(
+            "SELECT b.id, b.tender_id, b.author_id, a.username, e.username "
+            "FROM bid b "
+            "JOIN employee a ON a.id = b.author_id "
+            "JOIN tender t ON t.id = b.tender_id "
+            "JOIN employee e ON e.id = t.employee_id "
+            "WHERE b.status = 'Published' AND t.status = 'Published' LIMIT :limit"
+        ), {"limit": sample_size})
+        fixtures = Fixtures(
+            tenders=[TenderFixture(*row) for row in tenders],
+            bids=[BidFixture(*row) for row in bids]
+        )
+    if not fixtures.tenders or not fixtures.bids:
+        raise RuntimeError("No published tenders or bids found, run 'python -m benchmark seed' first")
+    return fixtures
+
+
+def _page(rng: random.Random) -> dict:
+    return {"limit": rng.choice((5, 10, 50)), "offset": rng.choice((0, 0, 0, 5, 50))}
+
+
+def _tender(fixtures: Fixtures, rng: random.Random) -> TenderFixture:
+    return rng.choice(fixtures.tenders)
+
+
+def _bid(fixtures: Fixtures, rng: random.Random) -> BidFixture:
+    return rng.choice(fixtures.bids)
+
+
+def _name(rng: random.Random) -> str:
+    return f"benchmark {rng.randrange(1_000_000)}"
+
+
+def get_tenders(fixtures: Fixtures, rng: random.Random) -> Call:
+    params = _page(rng)
+    if rng.random() < 0.5:
+        params["service_type"] = _tender(fixtures, rng).service_type
+    return Call("/api/tenders", "GET", "/api/tenders", params=params)
+
+
+def get_my_tenders(fixtures: Fixtures, rng: random.Random) -> Call:
+    params = {**_page(rng), "username": _tender(fixtures, rng).username}
+    return Call("/api/tenders/my", "GET", "/api/tenders/my", params=params)
+
+
+def get_tender_status(fixtures: Fixtures, rng: random.Random) -> Call:
+    tender = _tender(fixtures, rng)
+    return Call(
+        "/api/tenders/{tenderId}/status", "GET", f"/api/tenders/{tender.id}/status",
+        params={"username": tender.username}
+    )
+
+
+def get_my_bids(fixtures: Fixtures, rng: random.Random) -> Call:
+    params = {**_page(rng), "username": _bid(fixtures, rng).author_username}
+    return Call("/api/bids/my", "GET", "/api/bids/my", params=params)
+
+
+def get_tender_bids(fixtures: Fixtures, rng: random.Random) -> Call:
+    bid = _bid(fixtures, rng)
+    return Call(
+        "/api/bids/{tenderId}/list", "GET", f"/api/bids/{bid.tender_id}/list",
+        params={**_page(rng), "username": bid.tender_username}
+    )
+
+
+def get_bid_status(fixtures: Fixtures, rng: random.Random) -> Call:
+    bid = _bid(fixtures, rng)
+    return Call(
+        "/api/bids/{bidId}/status", "GET", f"/api/bids/{bid.id}/status",
+        params={"username": bid.author_username}
+    )
+
+
+def new_tender(fixtures: Fixtures, rng: random.Random) -> Call:
+    tender = _tender(fixtures, rng)
+    return Call("/api/tenders/new", "POST", "/api/tenders/new", json={
+        "name": _name(rng),
+        "description": "benchmark tender",
+        "service_type": tender.service_type,
+        "organization_id": str(tender.organization_id),
+        "creator_username": tender.username,
+    })
+
+
+def change_tender_status(fixtures: Fixtures, rng: random.Random) -> Call:
+    tender = _tender(fixtures, rng)
+    return Call(
+        "/api/tenders/{tenderId}/status", "PUT", f"/api/tenders/{tender.id}/status",
+        params={"status": "Published", "username": tender.username}
+    )
+
+
+def edit_tender(fixtures: Fixtures, rng: random.Random) -> Call:
+    tender = _tender(fixtures, rng)
+    return Call(
+        "/api/tenders/{tenderId}/edit", "PATCH", f"/api/tenders/{tender.id}/edit",
+        params={"username": tender.username}, json={"description": f"edited {_name(rng)}"}
+    )
+
+
+def rollback_tender(fixtures: Fixtures, rng: random.Random) -> Call:
+    tender = _tender(fixtures, rng)
+    return Call(
+        "/api/tenders/{tenderId}/rollback/{version}", "PUT", f"/api/tenders/{tender.id}/rollback/1",
+        params={"username": tender.username}
+    )
+
+
+def new_bid(fixtures: Fixtures, rng: random.Random) -> Call:
+    bid = _bid(fixtures, rng)
+    return Call("/api/bids/new", "POST", "/api/bids/new", json={
+        "name": _name(rng),
+        "description": "benchmark bid",
+        "tender_id": str(bid.tender_id),
+        "author_type": "User",
+        "author_id": str(bid.author_id),
+    })
+
+
+def change_bid_status(fixtures: Fixtures, rng: random.Random) -> Call:
+    bid = _bid(fixtures, rng)
+    return Call(
+        "/api/bids/{bidId}/status", "PUT", f"/api/bids/{bid.id}/status",
+        params={"status": "Published", "username": bid.author_username}
+    )
+
+
+def edit_bid(fixtures: Fixtures, rng: random.Random) -> Call:
+    bid = _bid(fixtures, rng)
+    return Call(
+        "/api/bids/{bidId}/edit", "PATCH", f"/api/bids/{bid.id}/edit",
+        params={"username": bid.author_username}, json={"name": None, "description": f"edited {_name(rng)}"}
+    )
+
+
+def submit_bid_decision(fixtures: Fixtures, rng: random.Random) -> Call:
+    # Rejected keeps the tender published, approving a bid would close it for the rest of the run
+    bid = _bid(fixtures, rng)
+    return Call(
+        "/api/bids/{bidId}/submit_decision", "PUT", f"/api/bids/{bid.id}/submit_decision",
+        params={"decision": "Rejected", "username": bid.tender_username}
+    )
+
+
+def rollback_bid(fixtures: Fixtures, rng: random.Random) -> Call:
+    bid = _bid(fixtures, rng)
+    return Call(
+        "/api/bids/{bidId}/rollback/{version}", "PUT", f"/api/bids/{bid.id}/rollback/1",
+        params={"username": bid.author_username}
+    )
+
+
+OPERATIONS = (
+    Operation(30, False, get_tenders),
+    Operation(10, False, get_my_tenders),
+    Operation(8, False, get_tender_status),
+    Operation(10, False, get_my_bids),
+    Operation(10, False, get_tender_bids),
+    Operation(8, False, get_bid_status),
+    Operation(3, True, new_tender),
+    Operation(2, True, change_tender_status),
+    Operation(4, True, edit_tender),
+    Operation(1, True, rollback_tender),
+    Operation(4, True, new_bid),
+    Operation(2, True, change_bid_status),
+    Operation(4, True, edit_bid),
+    Operation(1, True, submit_bid_decision),
+    Operation(1, True, rollback_bid),
+)
+
+
+def _route_key(call: Call) -> str:
+    return f"{call.method} {call.route}"
+
+
+async def run_load(
+        base_url: str,
+        fixtures: Fixtures,
+        concurrency: int = 16,
+        duration: float = 30.0,
+        warmup: float = 3.0,
+        write_weight: float = 1.0,
+        operations: tuple[Operation, ...] = OPERATIONS,
+        seed: int = 0
+) -> tuple[list[Sample], float]:
+    """
+    Replays the weighted read/write mix with ``concurrency`` parallel clients.
+    :return: samples collected after the warmup and the measured wall time
+    """
+    weights = [operation.weight * (write_weight if operation.write else 1) for operation in operations]
+    samples: list[Sample] = []
+    measure_from = time.perf_counter() + warmup
+    deadline = measure_from + duration
+
+    async def client(index: int, http: httpx.AsyncClient) -> None:
+        rng = random.Random(seed * 1_000 + index)
+        while (now := time.perf_counter()) < deadline:
+            call = rng.choices(operations, weights)[0].build(fixtures, rng)
+            request_started = time.perf_counter()
+            response = await http.request(call.method, call.url, params=call.params, json=call.json)
+            latency = time.perf_counter() - request_started
+            if now >= measure_from:
+                queries = response.headers.get("X-Query-Count")
+                samples.append(Sample(_route_key(call), response.status_code, latency, queries and int(queries)))
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as http:
+        await asyncio.gather(*(client(index, http) for index in range(concurrency)))
+    return samples, time.perf_counter() - measure_from
@@ -0,0 +1,93 @@
+import json
+import math
+import subprocess
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmark.load import Sample
+
+
+def percentile(values: list[float], rank: float) -> float:
+    """Nearest-rank percentile of already sorted values"""
+    if not values:
+        return math.nan
+    return values[max(0, math.ceil(rank / 100 * len(values)) - 1)]
+
+
+def current_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def summarize(samples: list[Sample], elapsed: float) -> dict:
+    by_route: dict[str, list[Sample]] = defaultdict(list)
+    for sample in samples:
+        by_route[sample.route].append(sample)
+
+    def stats(route_samples: list[Sample]) -> dict:
+        latencies = sorted(sample.latency * 1000 for sample in route_samples)
+        queries = [sample.queries for sample in route_samples if sample.queries is not None]
+        return {
+            "requests": len(route_samples),
+            "throughput_rps": round(len(route_samples) / elapsed, 2) if elapsed else None,
+            "status_codes": dict(sorted(Counter(str(sample.status) for sample in route_samples).items())),
+            "latency_ms": {
+                "mean": round(sum(latencies) / len(latencies), 3),
+                "p50": round(percentile(latencies, 50), 3),
+                "p95": round(percentile(latencies, 95), 3),
+                "p99": round(percentile(latencies, 99), 3),
+                "max": round(latencies[-1], 3),
+            },
+            "queries_per_request": round(sum(queries) / len(queries), 2) if queries else None,
+        }
+
+    return {
+        "total": stats(samples) if samples else {},
+        "routes": {route: stats(route_samples) for route, route_samples in sorted(by_route.items())},
+    }
+
+
+def write_report(path: Path, summary: dict, **metadata) -> dict:
+    report = {
+        "commit": current_commit(),
+        "finished_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        **metadata,
+        **summary,
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+    return report
+
+
+def print_report(report: dict) -> None:
+    print(f"{'route':<58} {'req':>7} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'q/req':>6}")
+    for route, stats in [*report["routes"].items(), ("TOTAL", report["total"])]:
+        if not stats:
+            continue
+        latency = stats["latency_ms"]
+        queries = stats["queries_per_request"]
+        print(
+            f"{route:<58} {stats['requests']:>7} {stats['throughput_rps']:>8} "
+            f"{latency['p50']:>8} {latency['p95']:>8} {latency['p99']:>8} {queries if queries is not None else '-':>6}"
+        )
+
+
+def compare_reports(base: dict, head: dict) -> None:
+    print(f"{base.get('commit')} -> {head.get('commit')}")
+    print(f"{'route':<58} {'p95 base':>9} {'p95 head':>9} {'change':>8} {'rps base':>9} {'rps head':>9}")
+    for route in sorted(set(base["routes"]) | set(head["routes"])):
+        old, new = base["routes"].get(route), head["routes"].get(route)
+        if not old or not new:
+            print(f"{route:<58} {'only in ' + ('head' if new else 'base'):>9}")
+            continue
+        old_p95, new_p95 = old["latency_ms"]["p95"], new["latency_ms"]["p95"]
+        change = f"{(new_p95 - old_p95) / old_p95 * 100:+.1f}%" if old_p95 else "-"
+        print(
+            f"{route:<58} {old_p95:>9} {new_p95:>9} {change:>8} "
+            f"{old['throughput_rps']:>9} {new['throughput_rps']:>9}"
+        )
@@ -0,0 +1,46 @@
+import sys
+from pathlib import Path
+
+from benchmark.load import Fixtures, run_load
+from benchmark.report import summarize
+from benchmark.startup import free_port, serve
+
+
+async def run_scaling(
+        fixtures: Fixtures,
+        workers: list[int],
+        concurrency: int = 64,
+        duration: float = 30.0,
+        warmup: float = 3.0,
+        seed: int = 0
+) -> dict[int, dict]:
+    """
+    Starts python -m app.server with every worker count in turn and replays the same load against it.
+    The server gets the same CONNECTION_BUDGET in every run, only its split between the workers changes.
+    """
+    results = {}
+    for count in workers:
+        port = free_port()
+        env = {"WORKERS": str(count), "SERVER_HOST": "127.0.0.1", "SERVER_PORT": str(port)}
+        with serve([sys.executable, "-m", "app.server"], Path.cwd(), env, port):
+            samples, elapsed = await run_load(
+                f"http://127.0.0.1:{port}",
+                fixtures,
+                concurrency=concurrency,
+                duration=duration,
+                warmup=warmup,
+                seed=seed
+            )
+        results[count] = summarize(samples, elapsed)["total"]
+    return results
+
+
+def print_scaling_results(results: dict[int, dict]) -> None:
+    base = next(iter(results.values()))["throughput_rps"] if results else None
+    print(f"{'workers':>7} {'rps':>9} {'scaling':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for count, total in results.items():
+        latency = total["latency_ms"]
+        print(
+            f"{count:>7} {total['throughput_rps']:>9} {total['throughput_rps'] / base:>7.2f}x "
+            f"{latency['p50']:>9} {latency['p95']:>9} {latency['p99']:>9}"
+        )
@@ -0,0 +1,83 @@
+import asyncio
+import random
+import time
+from collections import defaultdict
+
+import httpx
+from sqlalchemy import text
+
+from app.database import db_connector
+from app.schemas.tender_schema import ServiceType
+from benchmark.report import percentile
+from benchmark.seed import WORDS
+
+
+# query shapes differ in how many rows match and have to be ranked: a single seeded word matches
+# about half of all tenders, a phrase far fewer, "or" even more
+QUERY_SHAPES = {
+    "word": lambda rng: rng.choice(WORDS),
+    "two words": lambda rng: f"{rng.choice(WORDS)} {rng.choice(WORDS)}",
+    "phrase": lambda rng: f'"{rng.choice(WORDS)} {rng.choice(WORDS)}"',
+    "or": lambda rng: f"{rng.choice(WORDS)} or {rng.choice(WORDS)}",
+    "negation": lambda rng: f"{rng.choice(WORDS)} -{rng.choice(WORDS)}",
+    "no match": lambda rng: f"missing{rng.randrange(1_000_000)}",
+}
+
+
+async def count_tenders() -> int:
+    async with db_connector.engine.connect() as conn:
+        return await conn.scalar(text("SELECT count(*) FROM tender"))
+
+
+async def run_search(
+        base_url: str,
+        requests: int = 200,
+        concurrency: int = 8,
+        limit: int = 20,
+        pages: int = 3,
+        seed: int = 0
+) -> dict[str, dict]:
+    """
+    Sends ``requests`` searches of every query shape, half of them with a service_type filter,
+    following X-Next-Cursor for up to ``pages`` pages.
+    :return: latency percentiles per query shape and page number
+    """
+    latencies: dict[str, list[float]] = defaultdict(list)
+
+    async def client(index: int, http: httpx.AsyncClient, shape: str, count: int) -> None:
+        rng = random.Random(seed * 1_000 + index)
+        for _ in range(count):
+            params = {"q": QUERY_SHAPES[shape](rng), "limit": limit}
+            if rng.random() < 0.5:
+                params["service_type"] = rng.choice(list(ServiceType)).value
+            for page in range(1, pages + 1):
+                started_at = time.perf_counter()
+                response = await http.get("/api/tenders/search", params=params)
+                latencies[f"{shape} / page {page}"].append((time.perf_counter() - started_at) * 1000)
+                response.raise_for_status()
+                if "X-Next-Cursor" not in response.headers:
+                    break
+                params["cursor"] = response.headers["X-Next-Cursor"]
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60.0) as http:
+        for shape in QUERY_SHAPES:
+            per_client = max(1, requests // concurrency)
+            await asyncio.gather(*(client(index, http, shape, per_client) for index in range(concurrency)))
+
+    summary = {}
+    for key, values in latencies.items():
+        values.sort()
+        summary[key] = {
+            "requests": len(values),
+            "p50": round(percentile(values, 50), 3),
+            "p95": round(percentile(values, 95), 3),
+            "p99": round(percentile(values, 99), 3),
+        }
+    return summary
+
+
+def print_search_results(tenders: int, summary: dict[str, dict]) -> None:
+    print(f"tenders in table: {tenders}")
+    print(f"{'query':<24} {'req':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for key, stats in summary.items():
+        print(f"{key:<24} {stats['requests']:>6} {stats['p50']:>9} {stats['p95']:>9} {stats['p99']:>9}")
@@ -0,0 +1,194 @@
+import random
+from dataclasses import dataclass
+from typing import Iterable, Iterator
+from uuid import UUID
+
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.database import db_connector
+from app.models import Organization, Employee, OrganizationResponsible, Tender, TenderHistory, Bid, BidHistory
+from app.schemas.bid_schema import BidStatus, AuthorType
+from app.schemas.tender_schema import TenderStatus, ServiceType
+
+
+BATCH_SIZE = 5_000
+
+WORDS = (
+    "доставка", "строительство", "ремонт", "поставка", "оборудование", "мебель", "склад", "офис",
+    "логистика", "монтаж", "кабель", "бетон", "металл", "школа", "больница", "дорога", "мост",
+    "delivery", "construction", "equipment", "robotics", "olympiad", "warehouse", "printing",
+)
+
+# Seeded rows get deterministic ids, so related rows can be generated without keeping them in memory
+ID_PREFIXES = {
+    Organization: 0x0B,
+    Employee: 0x0E,
+    OrganizationResponsible: 0x0F,
+    Tender: 0x07,
+    TenderHistory: 0x17,
+    Bid: 0x0B1D,
+    BidHistory: 0x1B1D,
+}
+
+
+@dataclass
+class SeedVolumes:
+    organizations: int = 100
+    employees_per_organization: int = 5
+    tenders: int = 10_000
+    bids: int = 50_000
+    versions: int = 3
+
+
+def seeded_id(model: type, index: int) -> UUID:
+    return UUID(int=(ID_PREFIXES[model] << 96) | index)
+
+
+def username(organization: int, employee: int) -> str:
+    return f"bench_{organization}_{employee}"
+
+
+def _chunks(rows: Iterable[dict], size: int = BATCH_SIZE) -> Iterator[list[dict]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+class Seeder:
+    def __init__(self, volumes: SeedVolumes, seed: int = 0):
+        if volumes.organizations < 2:
+            raise ValueError("At least two organizations are needed to seed bids")
+        self.volumes = volumes
+        self.rng = random.Random(seed)
+
+    def tender_organization(self, tender: int) -> int:
+        return tender % self.volumes.organizations
+
+    def tender_employee(self, tender: int) -> int:
+        return (tender // self.volumes.organizations) % self.volumes.employees_per_organization
+
+    def employee_id(self, organization: int, employee: int) -> UUID:
+        return seeded_id(Employee, organization * self.volumes.employees_per_organization + employee)
+
+    def organizations(self) -> Iterator[dict]:
+        for organization in range(self.volumes.organizations):
+            yield {"id": seeded_id(Organization, organization), "name": f"Bench organization {organization}"}
+
+    def employees(self) -> Iterator[dict]:
+        for organization in range(self.volumes.organizations):
+            for employee in range(self.volumes.employees_per_organization):
+                yield {"id": self.employee_id(organization, employee), "username": username(organization, employee)}
+
+    def responsibles(self) -> Iterator[dict]:
+        for index, row in enumerate(self.employees()):
+            yield {
+                "id": seeded_id(OrganizationResponsible, index),
+                "organization_id": seeded_id(Organization, index // self.volumes.employees_per_organization),
+                "user_id": row["id"],
+            }
+
+    def tenders(self) -> Iterator[dict]:
+        service_types = list(ServiceType)
+        for tender in range(self.volumes.tenders):
+            organization = self.tender_organization(tender)
+            yield {
+                "id": seeded_id(Tender, tender),
+                "name": _text(self.rng, 3),
+                "description": _text(self.rng, 12),
+                "service_type": service_types[tender % len(service_types)],
+                "status": TenderStatus.published if tender % 5 else TenderStatus.created,
+                "organization_id": seeded_id(Organization, organization),
+                "employee_id": self.employee_id(organization, self.tender_employee(tender)),
+                "version": self.volumes.versions,
+            }
+
+    def tender_histories(self) -> Iterator[dict]:
+        for row in self.tenders():
+            tender = row["id"].int & ((1 << 96) - 1)
+            for version in range(1, self.volumes.versions + 1):
+                yield {
+                    "id": seeded_id(TenderHistory, tender * self.volumes.versions + version),
+                    "tender_id": row["id"],
+                    "version": version,
+                    "name": row["name"],
+                    "description": row["description"],
+                    "service_type": row["service_type"],
+                    "organization_id": row["organization_id"],
+                    "employee_id": row["employee_id"],
+                }
+
+    def bids(self) -> Iterator[dict]:
+        for bid in range(self.volumes.bids):
+            # only published tenders accept bids, every fifth tender is left in Created status
+            tender = self.rng.randrange(self.volumes.tenders)
+            if tender % 5 == 0:
+                tender = (tender + 1) % self.volumes.tenders
+            author_organization = (self.tender_organization(tender) + 1) % self.volumes.organizations
+            author = self.rng.randrange(self.volumes.employees_per_organization)
+            yield {
+                "id": seeded_id(Bid, bid),
+                "name": _text(self.rng, 3),
+                "description": _text(self.rng, 12),
+                "status": BidStatus.published if bid % 4 else BidStatus.created,
+                "tender_id": seeded_id(Tender, tender),
+                "author_type": AuthorType.user,
+                "author_id": self.employee_id(author_organization, author),
+                "version": self.volumes.versions,
+            }
+
+    def bid_histories(self) -> Iterator[dict]:
+        for row in self.bids():
+            bid = row["id"].int & ((1 << 96) - 1)
+            for version in range(1, self.volumes.versions + 1):
+                yield {
+                    "id": seeded_id(BidHistory, bid * self.volumes.versions + version),
+                    "bid_id": row["id"],
+                    "version": version,
+                    "name": row["name"],
+                    "description": row["description"],
+                }
+
+
+async def _insert(conn: AsyncConnection, model: type, rows: Iterable[dict]) -> int:
+    count = 0
+    for chunk in _chunks(rows):
+        await conn.execute(insert(model), chunk)
+        count += len(chunk)
+    return count
+
+
+async def seed(volumes: SeedVolumes, truncate: bool = False, seed_value: int = 0) -> dict[str, int]:
+    """
+    Fills the database configured through the POSTGRES_* settings with benchmark data.
+    Bids and bid histories are generated with the same random seed, so both passes produce the same rows.
+    """
+    counts = {}
+    async with db_connector.engine.begin() as conn:
+        if truncate:
+            await conn.execute(text(
+                "TRUNCATE bid_histories, bid, tender_histories, tender, history_texts, "
+                "organization_responsible, organization, employee"
+            ))
+        seeder = Seeder(volumes, seed_value)
+        counts["organizations"] = await _insert(conn, Organization, seeder.organizations())
+        counts["employees"] = await _insert(conn, Employee, seeder.employees())
+        counts["organization_responsibles"] = await _insert(conn, OrganizationResponsible, seeder.responsibles())
+        counts["tenders"] = await _insert(conn, Tender, seeder.tenders())
+        counts["tender_histories"] = await _insert(conn, TenderHistory, Seeder(volumes, seed_value).tender_histories())
+        counts["bids"] = await _insert(conn, Bid, Seeder(volumes, seed_value + 1).bids())
+        counts["bid_histories"] = await _insert(conn, BidHistory, Seeder(volumes, seed_value + 1).bid_histories())
+    async with db_connector.engine.connect() as conn:
+        autocommit = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        # VACUUM also flushes the pending list of the GIN search index, the planner avoids it until then
+        await autocommit.execute(text("VACUUM ANALYZE"))
+    return counts
@@ -0,0 +1,77 @@
+import asyncio
+import timeit
+from datetime import datetime
+from uuid import uuid4
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.models import Tender
+from app.schemas.tender_schema import TenderOut, ServiceType, TenderStatus
+from app.serialization import validate_list, list_response
+from benchmark.seed import WORDS
+
+
+def _rows(count: int) -> list[Tender]:
+    # transient ORM instances, attribute access goes through the same instrumentation as loaded rows
+    return [
+        Tender(
+            id=uuid4(),
+            name=" ".join(WORDS[(index + offset) % len(WORDS)] for offset in range(3)),
+            description=" ".join(WORDS[(index * offset) % len(WORDS)] for offset in range(12)),
+            service_type=ServiceType.delivery,
+            status=TenderStatus.published,
+            organization_id=uuid4(),
+            employee_id=uuid4(),
+            version=1,
+            created_at=datetime(2024, 1, 1, 12, 0, 0),
+        )
+        for index in range(count)
+    ]
+
+
+async def previous_path(rows: list[Tender], field) -> bytes:
+    """model_validate per row, then FastAPI validates the return value against the response model and encodes it"""
+    items = [TenderOut.model_validate(row) for row in rows]
+    content = await serialize_response(field=field, response_content=items, is_coroutine=True)
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+async def fast_path(rows: list[Tender]) -> bytes:
+    return list_response(TenderOut, validate_list(TenderOut, rows), len(rows), "name", "id").body
+
+
+def _time(loop: asyncio.AbstractEventLoop, path, args: tuple, repeat: int, number: int) -> float:
+    # both paths run as coroutines on the same loop, so they pay the same scheduling overhead
+    return min(timeit.repeat(lambda: loop.run_until_complete(path(*args)), repeat=repeat, number=number)) / number
+
+
+def run_serialization(sizes: tuple[int, ...] = (100, 1_000), repeat: int = 5, number: int = 20) -> list[dict]:
+    field = create_model_field(name="Response_get_tenders", type_=list[TenderOut], mode="serialization")
+    results = []
+    loop = asyncio.new_event_loop()
+    try:
+        for size in sizes:
+            rows = _rows(size)
+            assert (
+                loop.run_until_complete(previous_path(rows, field)) == loop.run_until_complete(fast_path(rows))
+            ), "both paths have to render the same JSON"
+            previous = _time(loop, previous_path, (rows, field), repeat, number)
+            fast = _time(loop, fast_path, (rows,), repeat, number)
+            results.append({
+                "rows": size,
+                "previous_ms": round(previous * 1000, 3),
+                "fast_ms": round(fast * 1000, 3),
+                "speedup": round(previous / fast, 2),
+            })
+    finally:
+        loop.close()
+    return results
+
+
+def print_serialization_results(results: list[dict]) -> None:
+    print(f"{'rows':>6} {'previous ms':>12} {'fast ms':>9} {'speedup':>8}")
+    for result in results:
+        print(f"{result['rows']:>6} {result['previous_ms']:>12} {result['fast_ms']:>9} {result['speedup']:>7}x")
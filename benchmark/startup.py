@@ -0,0 +1,86 @@
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+import httpx
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def serve(command: list[str], cwd: Path, env: dict[str, str], port: int, timeout: float = 60.0) -> Iterator[float]:
+    """
+    Runs a server process until the block exits.
+    :return: seconds from the process start until /api/ping answered 200
+    """
+    started_at = time.perf_counter()
+    process = subprocess.Popen(
+        command,
+        cwd=cwd,
+        env={**os.environ, **env},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    try:
+        yield _wait_for_ping(process, port, started_at, timeout)
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def _wait_for_ping(process: subprocess.Popen, port: int, started_at: float, timeout: float) -> float:
+    with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=1.0) as http:
+        while time.perf_counter() - started_at < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"Server exited with code {process.returncode}")
+            try:
+                if http.get("/api/ping").status_code == 200:
+                    return time.perf_counter() - started_at
+            except httpx.TransportError:
+                pass
+            time.sleep(0.01)
+    raise TimeoutError(f"Server did not answer within {timeout} seconds")
+
+
+def time_to_first_request(app_dir: Path, env: dict[str, str]) -> float:
+    port = free_port()
+    command = [sys.executable, "-m", "uvicorn", "main:app", "--app-dir", str(app_dir), "--port", str(port)]
+    with serve(command, app_dir, env, port) as elapsed:
+        return elapsed
+
+
+def run_startup(app_dirs: dict[str, Path], runs: int = 5) -> dict[str, dict]:
+    """
+    Measures time to first request for every startup mode. ``app_dirs`` maps a label to a checkout,
+    so a worktree of an older commit can be measured next to the current tree.
+    """
+    modes = {}
+    for label, app_dir in app_dirs.items():
+        modes[f"{label} / migrate on startup"] = (app_dir, {"MIGRATE_ON_STARTUP": "true"})
+        modes[f"{label} / check only"] = (app_dir, {"MIGRATE_ON_STARTUP": "false"})
+    summary = {}
+    for mode, (app_dir, env) in modes.items():
+        values = sorted(time_to_first_request(app_dir, env) * 1000 for _ in range(runs))
+        summary[mode] = {
+            "runs": runs,
+            "min": round(values[0], 1),
+            "median": round(statistics.median(values), 1),
+            "max": round(values[-1], 1),
+        }
+    return summary
+
+
+def print_startup_results(summary: dict[str, dict]) -> None:
+    print(f"{'mode':<40} {'runs':>5} {'min ms':>9} {'median ms':>10} {'max ms':>9}")
+    for mode, stats in summary.items():
+        print(f"{mode:<40} {stats['runs']:>5} {stats['min']:>9} {stats['median']:>10} {stats['max']:>9}")
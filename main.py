@@ -3,14 +3,26 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.api.metrics import metrics_router
 from app.api.routers import main_router
+from app.config import AppConfig, ProfilingConfig, LoopMonitorConfig
+from app.loop_monitor import loop_monitor
+from app.metrics import MetricsMiddleware
+from app.profiling import ProfilingMiddleware
 from app.pre_start import main
+from app.query_counter import QueryCountMiddleware
+from app.server_timing import ServerTimingMiddleware
 
 
 @asynccontextmanager
 async def lifespan(_):
     await main()
+    monitor_loop = LoopMonitorConfig().loop_monitor
+    if monitor_loop:
+        loop_monitor.start()
     yield
+    if monitor_loop:
+        await loop_monitor.stop()
 
 
 app = FastAPI(
@@ -24,6 +36,7 @@ app = FastAPI(
 
 
 app.include_router(main_router, prefix="/api")
+app.include_router(metrics_router, prefix="/api")
 
 
 app.add_middleware(
@@ -32,4 +45,14 @@ app.add_middleware(
     allow_credentials=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "X-Query-Count", "X-DB-Time", "Server-Timing"],
 )
+if AppConfig().server_timing_sample_rate > 0:
+    # added first so it runs inside QueryCountMiddleware and can read its DB time
+    app.add_middleware(ServerTimingMiddleware, sample_rate=AppConfig().server_timing_sample_rate)
+app.add_middleware(QueryCountMiddleware, header=AppConfig().debug, strict=AppConfig().strict_queries)
+app.add_middleware(MetricsMiddleware)
+
+profiling_config = ProfilingConfig()
+if profiling_config.profiling_secret or profiling_config.profiling_routes:
+    app.add_middleware(ProfilingMiddleware, config=profiling_config)
@@ -0,0 +1,74 @@
+import asyncio
+import os
+
+import pytest
+
+
+# Set before the app is imported: the engines and settings are built at import time.
+# The tests seed and truncate their own database, never the one the app uses.
+os.environ["POSTGRES_DATABASE"] = os.environ.get("TEST_POSTGRES_DATABASE", "tenders_test")
+# every test runs in an event loop of its own, pooled connections would belong to the previous one
+os.environ["USE_NULL_POOL"] = "true"
+os.environ["DEBUG"] = "true"
+os.environ["STRICT_QUERIES"] = "true"
+os.environ["MIGRATE_ON_STARTUP"] = "false"
+
+import asyncpg  # noqa: E402
+
+from app.config import PGConfig  # noqa: E402
+from benchmark.seed import SeedVolumes, seed  # noqa: E402
+
+
+# large enough for the planner to prefer an index over reading a whole table
+VOLUMES = SeedVolumes(organizations=100, employees_per_organization=5, tenders=10_000, bids=50_000, versions=3)
+
+
+async def _create_database(config: PGConfig) -> None:
+    conn = await asyncpg.connect(
+        host=config.postgres_host,
+        port=config.postgres_port,
+        user=config.postgres_username,
+        password=config.postgres_password,
+        database="postgres",
+        timeout=3
+    )
+    try:
+        exists = await conn.fetchval("SELECT 1 FROM pg_database WHERE datname = $1", config.postgres_database)
+        if not exists:
+            await conn.execute(f'CREATE DATABASE "{config.postgres_database}"')
+    finally:
+        await conn.close()
+
+
+@pytest.fixture(scope="session")
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+def database() -> None:
+    """Migrated test database, the tests using it are skipped when no PostgreSQL server is reachable"""
+    try:
+        asyncio.run(_create_database(PGConfig()))
+    except (OSError, asyncio.TimeoutError, asyncpg.PostgresError) as err:
+        pytest.skip(f"PostgreSQL is not reachable through the POSTGRES_* settings: {err!r}")
+
+    from app.pre_start import apply_migrations
+    asyncio.run(apply_migrations())
+
+
+@pytest.fixture(scope="session")
+def seeded(database) -> SeedVolumes:
+    asyncio.run(seed(VOLUMES, truncate=True))
+    return VOLUMES
+
+
+@pytest.fixture(autouse=True)
+def clear_caches() -> None:
+    # process wide caches would hide the queries the tests count
+    from app.services.employee_cache import employee_cache
+    from app.services.tender_list_cache import tender_list_cache
+    from app.services.version_cache import version_cache
+    employee_cache.clear()
+    tender_list_cache.clear()
+    version_cache.clear()
@@ -0,0 +1,55 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.database import db_connector
+from app.models import Bid, Employee, Tender
+from app.repositories.bid import BidRepository
+from app.repositories.tender import TenderRepository
+from benchmark.seed import seeded_id, username
+
+
+pytestmark = pytest.mark.anyio
+
+TENDER_ID = seeded_id(Tender, 1)
+# tender 1 belongs to organization 1 and was created by its first employee
+TENDER_USERNAME = username(1, 0)
+BID_ID = seeded_id(Bid, 1)
+
+
+async def _missing_row(*args, **kwargs) -> None:
+    # what the conditional update returns when the row was deleted after it was read
+    return None
+
+
+async def _bid_author_username() -> str:
+    async with db_connector.session_factory() as session:
+        bid = await session.get(Bid, BID_ID)
+        return (await session.get(Employee, bid.author_id)).username
+
+
+async def _requests() -> list[tuple[str, str, dict, dict | None, type, str]]:
+    bid_username = await _bid_author_username()
+    return [
+        ("PATCH", f"/api/tenders/{TENDER_ID}/edit", {"username": TENDER_USERNAME}, {"name": "edited"},
+         TenderRepository, "edit_tender_with_history"),
+        ("PUT", f"/api/tenders/{TENDER_ID}/rollback/1", {"username": TENDER_USERNAME}, None,
+         TenderRepository, "edit_tender_with_history"),
+        ("PATCH", f"/api/bids/{BID_ID}/edit", {"username": bid_username},
+         {"name": "edited", "description": "edited"}, BidRepository, "edit_bid_with_history"),
+        ("PUT", f"/api/bids/{BID_ID}/rollback/1", {"username": bid_username}, None,
+         BidRepository, "edit_bid_with_history"),
+    ]
+
+
+# the seed leaves every row at its last version
+@pytest.mark.parametrize("if_match, status_code", [(None, 404), ('"3"', 409)])
+async def test_edit_and_rollback_of_a_row_deleted_in_between(seeded, monkeypatch, if_match, status_code):
+    from main import app
+
+    headers = {"If-Match": if_match} if if_match else {}
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        for method, url, params, body, repository, edit in await _requests():
+            with monkeypatch.context() as patch:
+                patch.setattr(repository, edit, _missing_row)
+                response = await client.request(method, url, params=params, json=body, headers=headers)
+            assert response.status_code == status_code, f"{method} {url}: {response.text}"
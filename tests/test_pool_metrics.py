@@ -0,0 +1,36 @@
+import pytest
+
+from app.config import PGConfig
+from app.database import PGDatabase
+from app.metrics import Histogram, db_pool_connect, db_pool_wait
+
+
+pytestmark = pytest.mark.anyio
+
+
+def _totals(histogram: Histogram) -> tuple[int, float]:
+    """:return: observation count and sum of the unlabelled series"""
+    series = histogram._series.get((), [0] * (len(histogram.buckets) + 2))
+    return sum(series[:-1]), series[-1]
+
+
+async def test_pool_wait_excludes_opening_a_connection(database):
+    # the tests run with NullPool, this connector gets the queue pool of the application
+    connector = PGDatabase(PGConfig().model_copy(update={"use_null_pool": False, "pool_size": 1}), workers=1)
+    wait_before, connect_before = _totals(db_pool_wait), _totals(db_pool_connect)
+    try:
+        async with connector.engine.connect():
+            pass
+        opened_wait, opened_connect = _totals(db_pool_wait), _totals(db_pool_connect)
+        async with connector.engine.connect():
+            pass
+        reused_wait, reused_connect = _totals(db_pool_wait), _totals(db_pool_connect)
+    finally:
+        await connector.engine.dispose()
+
+    assert opened_connect[0] == connect_before[0] + 1
+    assert opened_wait[0] == wait_before[0] + 1
+    # a free slot in the pool: nothing is waited for, only the connect takes time
+    assert opened_wait[1] - wait_before[1] < opened_connect[1] - connect_before[1]
+    assert reused_connect == opened_connect
+    assert reused_wait[0] == opened_wait[0] + 1
@@ -0,0 +1,29 @@
+import asyncio
+
+import pytest
+from sqlalchemy import text
+
+from app.database import db_connector
+from app.pre_start import MIGRATION_LOCK_KEY, apply_migrations
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_migration_lock_waiter_does_not_block_concurrent_index_builds(database):
+    async with db_connector.engine.connect() as holder, db_connector.engine.connect() as builder:
+        holder = await holder.execution_options(isolation_level="AUTOCOMMIT")
+        builder = await builder.execution_options(isolation_level="AUTOCOMMIT")
+        await holder.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        waiter = asyncio.create_task(apply_migrations())
+        try:
+            await asyncio.sleep(0.5)
+            assert not waiter.done()
+            # a migration of the lock holder, it waits for the snapshots of every older transaction
+            await builder.execute(text("CREATE TABLE migration_lock_probe (id int)"))
+            await builder.execute(text("SET lock_timeout = '5s'"))
+            await builder.execute(text("CREATE INDEX CONCURRENTLY ON migration_lock_probe (id)"))
+        finally:
+            await builder.execute(text("DROP TABLE IF EXISTS migration_lock_probe"))
+            await holder.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+            await asyncio.wait_for(waiter, timeout=10)
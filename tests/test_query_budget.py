@@ -0,0 +1,100 @@
+import pytest
+from fastapi import Depends, FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select, text
+from sqlalchemy.orm import aliased
+
+from app.database import db_connector
+from app.models import Bid, Organization, Tender
+from app.query_counter import (
+    LazyLoadDetected,
+    QueryBudgetExceeded,
+    QueryCountMiddleware,
+    QueryCounter,
+    current_query_counter,
+    query_budget,
+)
+from app.schemas.bid_schema import BidStatus
+from app.schemas.tender_schema import TenderStatus
+from benchmark.seed import seeded_id, username
+
+
+pytestmark = pytest.mark.anyio
+
+
+def _client(app: FastAPI) -> AsyncClient:
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+
+
+def _organization_index(organization_id) -> int:
+    return organization_id.int - seeded_id(Organization, 0).int
+
+
+async def test_route_over_its_budget_raises(database):
+    app = FastAPI()
+    app.add_middleware(QueryCountMiddleware, header=True, strict=True)
+
+    @app.get("/two_queries", dependencies=[Depends(query_budget(1))])
+    async def two_queries() -> None:
+        async with db_connector.engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            await conn.execute(text("SELECT 2"))
+
+    async with _client(app) as client:
+        with pytest.raises(QueryBudgetExceeded, match="Query 2 exceeds the budget of 1"):
+            await client.get("/two_queries")
+
+
+async def test_lazy_load_raises(seeded):
+    token = current_query_counter.set(QueryCounter(strict=True))
+    try:
+        async with db_connector.session_factory() as session:
+            tender = await session.get(Tender, seeded_id(Tender, 1))
+            with pytest.raises(LazyLoadDetected, match="Lazy load from Tender"):
+                await session.run_sync(lambda _: tender.historical_versions)
+    finally:
+        current_query_counter.reset(token)
+
+
+async def _decidable_bid() -> tuple[Bid, Tender]:
+    """A published bid on a published tender, the only kind a decision can be submitted on"""
+    bid_tender = aliased(Tender)
+    async with db_connector.session_factory() as session:
+        result = await session.execute(
+            select(Bid, bid_tender)
+            .join(bid_tender, Bid.tender_id == bid_tender.id)
+            .where(Bid.status == BidStatus.published, bid_tender.status == TenderStatus.published)
+            .order_by(Bid.id)
+            .limit(1)
+        )
+        return result.one()
+
+
+async def test_declared_routes_stay_within_their_budgets(seeded):
+    from main import app
+
+    # tender 0 is left in Created status, only employees of its organization can read it
+    async with db_connector.session_factory() as session:
+        created_tender = await session.get(Tender, seeded_id(Tender, 0))
+    bid, tender = await _decidable_bid()
+    requests = [
+        ("GET", "/api/tenders", {}, 1),
+        (
+            "GET",
+            f"/api/tenders/{created_tender.id}/status",
+            {"username": username(_organization_index(created_tender.organization_id), 0)},
+            2
+        ),
+        (
+            "PUT",
+            f"/api/bids/{bid.id}/submit_decision",
+            {"decision": "Rejected", "username": username(_organization_index(tender.organization_id), 0)},
+            4
+        ),
+    ]
+
+    async with _client(app) as client:
+        for method, url, params, budget in requests:
+            response = await client.request(method, url, params=params)
+            assert response.status_code == 200, f"{method} {url}: {response.text}"
+            assert int(response.headers["X-Query-Count"]) <= budget, f"{method} {url}"
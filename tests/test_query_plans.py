@@ -0,0 +1,152 @@
+import re
+from typing import Awaitable, Callable
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncScalarResult, AsyncSession
+
+from app.database import db_connector
+from app.models import Bid, Employee, Organization, Tender
+from app.repositories.bid import BidRepository, BidHistoryRepository
+from app.repositories.employee import EmployeeRepository
+from app.repositories.organization import OrganizationRepository
+from app.repositories.tender import TenderRepository, TenderHistoryRepository
+from app.schemas.bid_schema import AuthorType
+from app.schemas.tender_schema import ServiceType
+from benchmark.seed import seeded_id, username
+
+
+pytestmark = pytest.mark.anyio
+
+# tables the seed fills with thousands of rows, reading one of them whole is a missing index
+LARGE_TABLES = {"tender", "tender_histories", "bid", "bid_histories"}
+
+# calls that read a large share of a table by design, a sequential scan is the cheapest plan for them
+FULL_READS = {
+    "TenderRepository.stream_published_tenders": "the export returns every published tender of the service types",
+}
+
+TENDER_ID = seeded_id(Tender, 1)
+BID_ID = seeded_id(Bid, 1)
+ORGANIZATION_ID = seeded_id(Organization, 1)
+# the first employee of organization 1, with 5 employees per organization
+EMPLOYEE_ID = seeded_id(Employee, 5)
+USERNAME = username(1, 0)
+
+NEW_TENDER = {
+    "name": "query plan",
+    "description": "query plan",
+    "service_type": ServiceType.delivery,
+    "organization_id": ORGANIZATION_ID,
+    "employee_id": EMPLOYEE_ID,
+}
+NEW_BID = {
+    "name": "query plan",
+    "description": "query plan",
+    "tender_id": TENDER_ID,
+    "author_type": AuthorType.user,
+    "author_id": EMPLOYEE_ID,
+}
+
+
+async def _first_partition(result: Awaitable[AsyncScalarResult]) -> None:
+    async for _ in (await result).partitions():
+        return
+
+
+REPOSITORY_CALLS: dict[str, Callable[[AsyncSession], Awaitable]] = {
+    "TenderRepository.add_tender_with_history":
+        lambda session: TenderRepository(session).add_tender_with_history(**NEW_TENDER),
+    "TenderRepository.add_tenders_with_history":
+        lambda session: TenderRepository(session).add_tenders_with_history([{**NEW_TENDER, "id": uuid4()}]),
+    "TenderRepository.get_tender_by_id":
+        lambda session: TenderRepository(session).get_tender_by_id(TENDER_ID),
+    "TenderRepository.get_tenders_by_ids":
+        lambda session: TenderRepository(session).get_tenders_by_ids({TENDER_ID, seeded_id(Tender, 2)}),
+    "TenderRepository.edit_tender_with_history":
+        lambda session: TenderRepository(session).edit_tender_with_history(TENDER_ID, 3, name="query plan"),
+    "TenderRepository.get_published_tenders":
+        lambda session: TenderRepository(session).get_published_tenders(5, 0),
+    "TenderRepository.get_published_tenders[service_type]":
+        lambda session: TenderRepository(session).get_published_tenders(5, 0, [ServiceType.delivery]),
+    "TenderRepository.get_published_tenders[after]":
+        lambda session: TenderRepository(session).get_published_tenders(5, 0, after=("m", TENDER_ID)),
+    "TenderRepository.stream_published_tenders":
+        lambda session: _first_partition(TenderRepository(session).stream_published_tenders([ServiceType.delivery])),
+    # a word the seed never uses, common ones match half of the table and are cheaper to scan
+    "TenderRepository.search_published_tenders":
+        lambda session: TenderRepository(session).search_published_tenders("quarry", 5),
+    "TenderRepository.get_tender_by_username":
+        lambda session: TenderRepository(session).get_tender_by_username(USERNAME, 5, 0),
+    "TenderHistoryRepository.get_tender_history":
+        lambda session: TenderHistoryRepository(session).get_tender_history(TENDER_ID, 1),
+    "TenderHistoryRepository.get_tender_version":
+        lambda session: TenderHistoryRepository(session).get_tender_version(TENDER_ID, 1),
+    "TenderHistoryRepository.get_tender_versions":
+        lambda session: TenderHistoryRepository(session).get_tender_versions(TENDER_ID, 5),
+    "BidRepository.add_bid_with_history":
+        lambda session: BidRepository(session).add_bid_with_history(**NEW_BID),
+    "BidRepository.add_bids_with_history":
+        lambda session: BidRepository(session).add_bids_with_history([{**NEW_BID, "id": uuid4()}]),
+    "BidRepository.get_bid_by_id":
+        lambda session: BidRepository(session).get_bid_by_id(BID_ID),
+    "BidRepository.edit_bid_with_history":
+        lambda session: BidRepository(session).edit_bid_with_history(BID_ID, 3, name="query plan"),
+    "BidRepository.get_bids_by_username":
+        lambda session: BidRepository(session).get_bids_by_username(USERNAME, 5, 0),
+    "BidRepository.stream_bids_by_username":
+        lambda session: _first_partition(BidRepository(session).stream_bids_by_username(USERNAME)),
+    "BidRepository.get_bids_by_tender_id_and_username":
+        lambda session: BidRepository(session).get_bids_by_tender_id_and_username(TENDER_ID, ORGANIZATION_ID, 5, 0),
+    "BidRepository.get_bid_for_submit_decision":
+        lambda session: BidRepository(session).get_bid_for_submit_decision(BID_ID),
+    "BidHistoryRepository.get_bid_history":
+        lambda session: BidHistoryRepository(session).get_bid_history(BID_ID, 1),
+    "BidHistoryRepository.get_bid_version":
+        lambda session: BidHistoryRepository(session).get_bid_version(BID_ID, 1),
+    "BidHistoryRepository.get_bid_versions":
+        lambda session: BidHistoryRepository(session).get_bid_versions(BID_ID, 5),
+    "EmployeeRepository.get_employee":
+        lambda session: EmployeeRepository(session).get_employee(username=USERNAME),
+    "EmployeeRepository.get_employees":
+        lambda session: EmployeeRepository(session).get_employees("id", {EMPLOYEE_ID}),
+    "EmployeeRepository.get_employees_organization":
+        lambda session: EmployeeRepository(session).get_employees_organization(EMPLOYEE_ID, seeded_id(Employee, 6)),
+    "OrganizationRepository.get_organization_by_id":
+        lambda session: OrganizationRepository(session).get_organization_by_id(ORGANIZATION_ID),
+    "OrganizationRepository.get_existing_organization_ids":
+        lambda session: OrganizationRepository(session).get_existing_organization_ids({ORGANIZATION_ID}),
+}
+
+
+async def _capture_statements(call: Callable[[AsyncSession], Awaitable]) -> list[tuple[str, tuple]]:
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany) -> None:
+        statements.append((statement, parameters))
+
+    event.listen(db_connector.engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        async with db_connector.session_factory() as session:
+            await call(session)
+            await session.rollback()
+    finally:
+        event.remove(db_connector.engine.sync_engine, "before_cursor_execute", capture)
+    return statements
+
+
+async def _explain(statement: str, parameters: tuple) -> str:
+    async with db_connector.engine.connect() as conn:
+        result = await conn.exec_driver_sql(f"EXPLAIN {statement}", tuple(parameters))
+        return "\n".join(row[0] for row in result)
+
+
+@pytest.mark.parametrize("name", REPOSITORY_CALLS)
+async def test_repository_statements_do_not_scan_large_tables(seeded, name):
+    statements = await _capture_statements(REPOSITORY_CALLS[name])
+    assert statements, f"{name} issued no statement"
+    for statement, parameters in statements:
+        plan = await _explain(statement, parameters)
+        scanned = LARGE_TABLES.intersection(re.findall(r"Seq Scan on (\w+)", plan))
+        assert not scanned or name in FULL_READS, f"{name} reads all of {sorted(scanned)}:\n{statement}\n{plan}"
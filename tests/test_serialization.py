@@ -0,0 +1,46 @@
+import pytest
+from fastapi import FastAPI, Response
+from httpx import ASGITransport, AsyncClient
+
+from app.schemas.tender_schema import TenderOut
+from app.serialization import list_response, validate_list
+from app.utils import next_cursor
+from benchmark.serialization import _rows
+
+
+pytestmark = pytest.mark.anyio
+
+LIMIT = 5
+
+
+def _app(row_count: int) -> FastAPI:
+    """The same page served through the response model, as the list endpoints did before, and through list_response"""
+    rows = _rows(row_count)
+    app = FastAPI()
+
+    @app.get("/previous")
+    async def previous(response: Response) -> list[TenderOut]:
+        items = [TenderOut.model_validate(row) for row in rows]
+        cursor = next_cursor(items, LIMIT, "name", "id")
+        if cursor:
+            response.headers["X-Next-Cursor"] = cursor
+        return items
+
+    @app.get("/fast")
+    async def fast() -> list[TenderOut]:
+        return list_response(TenderOut, validate_list(TenderOut, rows), LIMIT, "name", "id")
+
+    return app
+
+
+# a full page carries a cursor, a short or empty one does not
+@pytest.mark.parametrize("row_count", [LIMIT, LIMIT - 2, 0])
+async def test_list_response_matches_response_model(row_count):
+    async with AsyncClient(transport=ASGITransport(app=_app(row_count)), base_url="http://test") as client:
+        previous = await client.get("/previous")
+        fast = await client.get("/fast")
+    assert fast.status_code == previous.status_code == 200
+    assert fast.content == previous.content
+    for header in ("content-type", "content-length", "x-next-cursor"):
+        assert fast.headers.get(header) == previous.headers.get(header)
+    assert ("x-next-cursor" in fast.headers) == (row_count == LIMIT)
@@ -0,0 +1,40 @@
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config import PGConfig
+from app.database import PGDatabase
+from app.repositories.tender import TenderRepository
+from app.services import tender_service
+from app.services.tender_list_cache import page_key, tender_list_cache
+from app.services.tender_service import TenderService
+
+
+pytestmark = pytest.mark.anyio
+
+
+def _count_statements(engine: AsyncEngine, counts: dict[str, int], name: str) -> None:
+    def count(*_) -> None:
+        counts[name] += 1
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+
+
+async def test_cache_filling_miss_reads_from_the_primary(seeded, monkeypatch):
+    config = PGConfig()
+    # the same server under a second engine stands for the replica
+    connector = PGDatabase(config.model_copy(update={"postgres_replica_host": config.postgres_host}))
+    monkeypatch.setattr(tender_service, "db_connector", connector)
+    counts = {"primary": 0, "replica": 0}
+    _count_statements(connector.engine, counts, "primary")
+    _count_statements(connector.read_engine, counts, "replica")
+    try:
+        async with connector.read_session_factory() as session:
+            service = TenderService(TenderRepository(session), None, None, None)
+            page = await service.get_published_tenders_page(5, 0)
+    finally:
+        await connector.engine.dispose()
+        await connector.read_engine.dispose()
+
+    assert counts == {"primary": 1, "replica": 0}
+    assert tender_list_cache.get(page_key(None, 5, 0, None)) == page